@@ -0,0 +1,118 @@
+"""
+Load generator for AllocationServer.py.
+
+Opens --connections connections to a running allocation server and keeps
+--concurrency requests in flight on each until --requests have been answered,
+then reports throughput and the p50/p99/max request latency along with the
+server's batching counters.
+
+    python AllocationBenchmark.py                          # against localhost:8765
+    python AllocationBenchmark.py --spawn --workers 2      # start a server for the run
+    python AllocationBenchmark.py --size 40 60 --distinct 8
+
+The requests cycle through --distinct random problems of --size patterns by
+resources, so with a small --distinct most of them are coalesced on the server.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from AllocationServer import DEFAULT_HOST, DEFAULT_PORT, AllocationClient
+
+
+def random_problems(count, patterns, resources, seed=0):
+    rng = np.random.default_rng(seed)
+    problems = []
+    for _ in range(count):
+        weights = rng.random(patterns)
+        problems.append({'utility': rng.random((patterns, resources)).tolist(),
+                         'importance_weights': (weights / weights.sum()).tolist(),
+                         'total_resources': float(patterns * resources),
+                         'pattern_matrix': (rng.random((patterns, resources)) + 0.5).tolist()})
+    return problems
+
+
+async def run_load(host, port, problems, requests=500, connections=4, concurrency=8):
+    """
+    Send requests problems (cycling through the list) and time each one.
+
+    Returns:
+    tuple: (latencies in seconds, wall-clock seconds, errors, server stats).
+    """
+    clients = [await AllocationClient(host, port).connect() for _ in range(connections)]
+    issued = iter(range(requests))
+    latencies = []
+    errors = 0
+
+    async def worker(client):
+        nonlocal errors
+        for n in issued:
+            start = time.perf_counter()
+            response = await client.request(problems[n % len(problems)])
+            latencies.append(time.perf_counter() - start)
+            errors += 'error' in response
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(client) for client in clients for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stats = await clients[0].stats()
+    for client in clients:
+        await client.close()
+    return np.array(latencies), elapsed, errors, stats
+
+
+def _spawn_server(host, port, workers):
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'AllocationServer.py'),
+               '--host', host, '--port', str(port)]
+    if workers:
+        command += ['--workers', str(workers)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    # The server prints one line once it is listening
+    if not server.stdout.readline():
+        raise RuntimeError("Allocation server failed to start")
+    return server
+
+
+def print_report(latencies, elapsed, errors, stats):
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+    print(f"requests:   {len(latencies)} in {elapsed:.2f} s ({len(latencies) / elapsed:.1f} req/s), {errors} errors")
+    print(f"latency:    p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {latencies.max() * 1e3:.1f} ms")
+    print(f"server:     {stats['requests']} requests in {stats['batches']} batches "
+          f"({stats['batches'] / max(1, stats['requests']):.3f} batches per request), "
+          f"{stats['solved']} solved ({stats['requests'] - stats['solved']} coalesced)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the PBRA allocation server.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=8, help="requests in flight per connection")
+    parser.add_argument('--size', type=int, nargs=2, default=(20, 30), metavar=('PATTERNS', 'RESOURCES'))
+    parser.add_argument('--distinct', type=int, default=64, help="number of different problems to cycle through")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spawn', action='store_true', help="start a server on --port for the run")
+    parser.add_argument('--workers', type=int, default=None, help="solver processes of the spawned server")
+    args = parser.parse_args(argv)
+
+    problems = random_problems(args.distinct, *args.size, seed=args.seed)
+    server = _spawn_server(args.host, args.port, args.workers) if args.spawn else None
+    try:
+        print_report(*asyncio.run(run_load(args.host, args.port, problems, args.requests, args.connections,
+                                           args.concurrency)))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
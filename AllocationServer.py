@@ -0,0 +1,427 @@
+"""
+Asyncio allocation service for the PBRA system.
+
+Clients send allocation problems as newline-delimited JSON over TCP and get
+the allocate() result back on the same connection:
+
+    -> {"id": 1, "utility": [[...]], "importance_weights": [...], "total_resources": 100.0,
+        "pattern_matrix": [[...]], "weight_vector": [...], "resource_capacity": [...]}
+    <- {"id": 1, "allocation": [[...]], "utility": 97.3, "success": true, "message": "..."}
+
+The last three problem fields are optional. A request {"id": 2, "stats": true}
+returns the server's counters instead, and malformed requests or failed
+solves come back as {"id": ..., "error": "..."}.
+
+Requests are not solved one by one. The event loop only parses and queues
+them (lines over INLINE_PARSE_LIMIT are not parsed there at all, but handed
+to a worker as raw bytes). A batcher collects everything that arrives within
+batch_window seconds (up to max_batch requests), and for as long after that
+as every worker is still busy, coalesces identical request lines (by a hash
+of their bytes, leaving out a trailing "id") so each is solved once, and
+hands the unique ones to the free workers of a process pool in one task
+each. Solving never blocks the event loop, and a burst of small requests
+costs a few inter-process round trips instead of one per request (the
+benchmark reports batches per request).
+
+    python AllocationServer.py --port 8765 --workers 4
+    python AllocationBenchmark.py --port 8765         # load generator
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import re
+import signal
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ResourceAllocator import allocate
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Seconds a batch keeps collecting after its first request
+DEFAULT_BATCH_WINDOW = 0.01
+
+# Largest request or response line, in bytes
+LINE_LIMIT = 1 << 26
+
+# Lines up to this size are parsed on the event loop (about a millisecond); longer ones only in a worker
+INLINE_PARSE_LIMIT = 1 << 16
+
+_PROBLEM_FIELDS = ('utility', 'importance_weights', 'total_resources', 'pattern_matrix', 'weight_vector',
+                   'resource_capacity')
+
+
+# The "id" member a request ends with, as AllocationClient writes it
+_TRAILING_ID = re.compile(rb',\s*"id"\s*:\s*(-?\d+|"[^"\\]*"|null)\s*\}\s*$')
+
+# Request id of a long line whose id is only known once a worker has parsed it
+_WORKER_ID = object()
+
+
+class AllocationError(Exception):
+    pass
+
+
+def _problem(request):
+    problem = {name: request[name] for name in _PROBLEM_FIELDS if name in request}
+    missing = {'utility', 'importance_weights', 'total_resources'} - problem.keys()
+    if missing:
+        raise AllocationError(f"Missing fields: {', '.join(sorted(missing))}")
+    return problem
+
+def _line_key(line):
+    """
+    Coalescing key of a request line: a hash of its raw bytes without a trailing "id" member.
+
+    Returns:
+    tuple: (key, the id's JSON text or None when the line does not end with one).
+    """
+    start = line.rfind(b',', 0, max(0, line.rfind(b'"id"')))
+    match = _TRAILING_ID.match(line, start) if start >= 0 else None
+    digest = hashlib.blake2b(digest_size=16)
+    # Hashed through a memoryview, without copying the line (blake2b drops the GIL on large input)
+    digest.update(memoryview(line)[:start] if match else line)
+    return digest.digest(), match and match.group(1)
+
+def _solve(problem):
+    def array(name):
+        value = problem.get(name)
+        return None if value is None else np.asarray(value, dtype=float)
+
+    weight_vector = array('weight_vector')
+    result = allocate(array('utility'), array('importance_weights'), float(problem['total_resources']),
+                      pattern_matrix=array('pattern_matrix'),
+                      weight_vector=1.0 if weight_vector is None else weight_vector,
+                      resource_capacity=array('resource_capacity'))
+    return {'allocation': result.allocation.tolist(), 'utility': float(result.utility),
+            'success': bool(result.success), 'message': str(result.message)}
+
+def _solve_batch(problems):
+    # Runs in a worker process: one round trip for a whole slice of a batch
+    # Long request lines arrive as raw bytes, parsed here rather than on the server's event loop
+    results = []
+    for problem in problems:
+        request_id = None
+        try:
+            if isinstance(problem, bytes):
+                request = json.loads(problem)
+                request_id = request.get('id')
+                problem = _problem(request)
+            result = _solve(problem)
+        except Exception as exc:
+            result = {'error': f"{type(exc).__name__}: {exc}"}
+        results.append(result if request_id is None else dict(result, id=request_id))
+    return results
+
+
+class AllocationServer:
+    """
+    Batching, coalescing asyncio front end to a process pool of allocate() workers.
+
+    Parameters:
+    host (str): Interface to listen on.
+    port (int): Port to listen on; 0 picks a free one (see self.port after start()).
+    workers (int): Solver processes; defaults to the number of CPUs.
+    batch_window (float): Seconds to keep collecting requests after the first of a batch.
+    max_batch (int): Most requests in one batch.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, batch_window=DEFAULT_BATCH_WINDOW, max_batch=64):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.stats = {'requests': 0, 'batches': 0, 'solved': 0, 'errors': 0}
+        self._pool = None
+        self._server = None
+        self._queue = None
+        self._batcher = None
+        self._dispatches = set()
+        self._connections = set()
+        # Worker slices in flight, and an event set whenever one finishes
+        self._busy = 0
+        self._worker_free = None
+
+    async def start(self):
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        self._queue = asyncio.Queue()
+        self._worker_free = asyncio.Event()
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=LINE_LIMIT)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        for connection in self._connections:
+            connection.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+        self._batcher.cancel()
+        await asyncio.gather(self._batcher, return_exceptions=True)
+        # Requests still queued will never be solved; fail them rather than leave them pending
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(AllocationError("Allocation server closed"))
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+        self._pool.shutdown()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _handle(self, reader, writer):
+        connection = asyncio.current_task()
+        self._connections.add(connection)
+        write_lock = asyncio.Lock()
+        replies = set()
+
+        async def reply(request_id, future):
+            try:
+                response = await future
+            except Exception as exc:
+                response = {'error': f"{type(exc).__name__}: {exc}"}
+            response = dict(response)
+            parsed_id = response.pop('id', None)
+            response['id'] = parsed_id if request_id is _WORKER_ID else request_id
+            async with write_lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+
+        try:
+            while True:
+                request_id = None
+                future = asyncio.get_running_loop().create_future()
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than LINE_LIMIT; the rest of it cannot be told from the next request, so reply and hang up
+                    self.stats['errors'] += 1
+                    future.set_result({'error': f"AllocationError: Request line exceeds {LINE_LIMIT} bytes"})
+                    replies.add(asyncio.create_task(reply(request_id, future)))
+                    break
+                if not line:
+                    break
+                try:
+                    if len(line) > INLINE_PARSE_LIMIT:
+                        # Hash in a thread and leave parsing and validation to the worker
+                        key, id_text = await asyncio.get_running_loop().run_in_executor(None, _line_key, line)
+                        request_id = _WORKER_ID if id_text is None else json.loads(id_text)
+                        self.stats['requests'] += 1
+                        self._queue.put_nowait((key, line, future))
+                    else:
+                        request = json.loads(line)
+                        request_id = request.get('id')
+                        if request.get('stats'):
+                            future.set_result(dict(self.stats))
+                        else:
+                            problem = _problem(request)
+                            self.stats['requests'] += 1
+                            self._queue.put_nowait((_line_key(line)[0], problem, future))
+                except (ValueError, AttributeError, AllocationError) as exc:
+                    self.stats['errors'] += 1
+                    future.set_result({'error': f"{type(exc).__name__}: {exc}"})
+                task = asyncio.create_task(reply(request_id, future))
+                replies.add(task)
+                task.add_done_callback(replies.discard)
+            if replies:
+                await asyncio.gather(*replies, return_exceptions=True)
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Only close() cancels a connection; end it quietly rather than as an unhandled error
+            for task in replies:
+                task.cancel()
+        finally:
+            self._connections.discard(connection)
+            writer.close()
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            try:
+                while len(batch) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                # Hold the batch while every worker is busy, so requests pile up behind it instead of
+                # each going to the pool on its own
+                while self._busy >= self.workers:
+                    self._worker_free.clear()
+                    await self._worker_free.wait()
+            except asyncio.CancelledError:
+                # close() stopped us mid-collection; the requests gathered so far will not be solved
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(AllocationError("Allocation server closed"))
+                raise
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        # Coalesce identical problems, then give each free worker one contiguous slice
+        waiting = {}
+        for key, problem, future in batch:
+            waiting.setdefault(key, (problem, []))[1].append(future)
+        unique = list(waiting.values())
+        self.stats['batches'] += 1
+        self.stats['solved'] += len(unique)
+
+        for part in np.array_split(np.arange(len(unique)), min(self.workers - self._busy, len(unique))):
+            self._busy += 1
+            # Each slice is answered as soon as its worker is done, not behind slower slices
+            task = asyncio.create_task(self._solve_slice([unique[i] for i in part]))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _solve_slice(self, entries):
+        try:
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self._pool, _solve_batch, [problem for problem, _ in entries])
+            except Exception as exc:
+                results = [{'error': f"{type(exc).__name__}: {exc}"}] * len(entries)
+            for (_, futures), result in zip(entries, results):
+                for future in futures:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            self._busy -= 1
+            self._worker_free.set()
+
+
+class AllocationClient:
+    """
+    Asyncio client for AllocationServer; requests on one connection may be in flight together.
+
+    Parameters:
+    host (str): The server's host.
+    port (int): The server's port.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self._ids = itertools.count()
+        self._pending = {}
+        self._reader = self._writer = self._listener = None
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port, limit=LINE_LIMIT)
+        self._listener = asyncio.create_task(self._listen())
+        return self
+
+    async def close(self):
+        self._writer.close()
+        self._listener.cancel()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _listen(self):
+        try:
+            while line := await self._reader.readline():
+                response = json.loads(line)
+                future = self._pending.pop(response.pop('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection to the allocation server closed"))
+            self._pending.clear()
+
+    async def request(self, message):
+        """
+        Send one raw request and wait for its response.
+        """
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(json.dumps(dict(message, id=request_id)).encode() + b'\n')
+        await self._writer.drain()
+        return await future
+
+    async def allocate(self, utility_matrix, importance_weights, total_resources, pattern_matrix=None,
+                       weight_vector=None, resource_capacity=None):
+        """
+        Solve an allocation problem on the server; arguments as for allocate().
+
+        Returns:
+        dict: 'allocation' (nested lists), 'utility', 'success' and 'message'.
+        """
+        message = {'utility': np.asarray(utility_matrix, dtype=float).tolist(),
+                   'importance_weights': np.asarray(importance_weights, dtype=float).tolist(),
+                   'total_resources': float(total_resources)}
+        for name, value in (('pattern_matrix', pattern_matrix), ('weight_vector', weight_vector),
+                            ('resource_capacity', resource_capacity)):
+            if value is not None:
+                message[name] = np.asarray(value, dtype=float).tolist()
+        response = await self.request(message)
+        if 'error' in response:
+            raise AllocationError(response['error'])
+        return response
+
+    async def stats(self):
+        return await self.request({'stats': True})
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, batch_window=DEFAULT_BATCH_WINDOW, max_batch=64):
+    async with AllocationServer(host, port, workers, batch_window, max_batch) as server:
+        print(f"Allocation server listening on {server.host}:{server.port} with {server.workers} workers",
+              flush=True)
+        # Shut down cleanly on SIGTERM too, so the worker processes are not orphaned
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, AttributeError):
+                pass
+        await stop.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve PBRA allocations over TCP.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-window', type=float, default=DEFAULT_BATCH_WINDOW, help="seconds to collect a batch")
+    parser.add_argument('--max-batch', type=int, default=64)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.batch_window, args.max_batch))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Benchmark and profiling harness for the curvature pipeline.
+
+Times each stage of EinsteinSchwarzschildChristoffel.py separately -- the
+metric inverse, christoffel(), ricci_tensor() and pretty-print rendering --
+over a catalog of metrics, and reports the expression node count each stage
+produces and its peak memory.
+
+    python CurvatureBenchmark.py                         # run the whole catalog
+    python CurvatureBenchmark.py --metrics kerr flrw     # run a subset
+    python CurvatureBenchmark.py --save-baseline         # record the current timings
+    python CurvatureBenchmark.py --check                 # fail if a stage got slower
+
+Timings are the best of --repeat runs with the sympy cache cleared before each
+one; memory is measured in a separate tracemalloc run so it does not skew the
+timings. In --check mode the exit status is 1 when any stage is slower than the
+stored baseline by more than --tolerance (relative) and --min-delta (absolute).
+With both --check and --save-baseline the run is checked against the stored
+baseline first, and only replaces it when there are no regressions.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import sympy as sp
+from sympy.core.cache import clear_cache
+
+from EinsteinSchwarzschildChristoffel import christoffel, ricci_tensor
+
+STAGES = ('inverse', 'christoffel', 'ricci', 'pprint')
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'curvature_baseline.json')
+
+
+# Metric catalog, in geometrized units (G = c = 1) except for Schwarzschild
+def schwarzschild():
+    t, r, theta, phi, M, G, c = sp.symbols('t r theta phi M G c')
+    f = 1 - 2*G*M/(c**2*r)
+    return sp.diag(-f, 1/f, r**2, r**2 * sp.sin(theta)**2), (t, r, theta, phi)
+
+def reissner_nordstrom():
+    t, r, theta, phi, M, Q = sp.symbols('t r theta phi M Q')
+    f = 1 - 2*M/r + Q**2/r**2
+    return sp.diag(-f, 1/f, r**2, r**2 * sp.sin(theta)**2), (t, r, theta, phi)
+
+def kerr():
+    t, r, theta, phi, M, a = sp.symbols('t r theta phi M a')
+    Sigma = r**2 + a**2 * sp.cos(theta)**2
+    Delta = r**2 - 2*M*r + a**2
+    g_tphi = -2*M*a*r * sp.sin(theta)**2 / Sigma
+    g = sp.Matrix([
+        [-(1 - 2*M*r/Sigma), 0, 0, g_tphi],
+        [0, Sigma/Delta, 0, 0],
+        [0, 0, Sigma, 0],
+        [g_tphi, 0, 0, (r**2 + a**2 + 2*M*a**2*r * sp.sin(theta)**2 / Sigma) * sp.sin(theta)**2]
+    ])
+    return g, (t, r, theta, phi)
+
+def flrw():
+    t, r, theta, phi, k = sp.symbols('t r theta phi k')
+    a = sp.Function('a')(t)
+    return sp.diag(-1, a**2 / (1 - k*r**2), a**2 * r**2, a**2 * r**2 * sp.sin(theta)**2), (t, r, theta, phi)
+
+def de_sitter():
+    t, r, theta, phi, Lambda = sp.symbols('t r theta phi Lambda')
+    f = 1 - Lambda*r**2/3
+    return sp.diag(-f, 1/f, r**2, r**2 * sp.sin(theta)**2), (t, r, theta, phi)
+
+METRICS = {
+    'schwarzschild': schwarzschild,
+    'reissner_nordstrom': reissner_nordstrom,
+    'kerr': kerr,
+    'flrw': flrw,
+    'de_sitter': de_sitter,
+}
+
+
+def count_nodes(obj):
+    """
+    Count the expression tree nodes in an expression, matrix or array.
+
+    Parameters:
+    obj (sympy expression, Matrix or NDimArray): The object to measure.
+
+    Returns:
+    int or None: The total number of nodes, or None for rendered strings.
+    """
+    if isinstance(obj, str):
+        return None
+    if hasattr(obj, 'tolist'):
+        return sum(count_nodes(e) for e in sp.flatten(obj.tolist()))
+    return sum(1 for _ in sp.preorder_traversal(sp.sympify(obj)))
+
+
+def _run_pipeline(g, symbols, exact, record):
+    # Run each stage once, handing its timing window to record(stage, fn)
+    g_inv = record('inverse', g.inv)
+    Gamma = record('christoffel', lambda: christoffel(g, g_inv, symbols, exact=exact))
+    R = record('ricci', lambda: ricci_tensor(Gamma, symbols))
+    record('pprint', lambda: sp.pretty(R))
+
+
+def benchmark_metric(name, repeat=3, exact=False, memory=True):
+    """
+    Benchmark every stage of the pipeline on one catalog metric.
+
+    Parameters:
+    name (str): The catalog entry.
+    repeat (int): Timing runs; the fastest is reported.
+    exact (bool): Run christoffel() in exact-rational mode.
+    memory (bool): Also measure peak memory per stage with tracemalloc.
+
+    Returns:
+    dict: stage -> {'seconds', 'nodes', 'peak_bytes'}.
+    """
+    g, symbols = METRICS[name]()
+    results = {stage: {'seconds': float('inf'), 'nodes': None, 'peak_bytes': None} for stage in STAGES}
+
+    def timed(stage, fn):
+        start = time.perf_counter()
+        value = fn()
+        elapsed = time.perf_counter() - start
+        entry = results[stage]
+        entry['seconds'] = min(entry['seconds'], elapsed)
+        if entry['nodes'] is None:
+            entry['nodes'] = count_nodes(value)
+        return value
+
+    for _ in range(repeat):
+        clear_cache()
+        _run_pipeline(g, symbols, exact, timed)
+
+    if memory:
+        def traced(stage, fn):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            value = fn()
+            results[stage]['peak_bytes'] = tracemalloc.get_traced_memory()[1] - before
+            return value
+
+        clear_cache()
+        tracemalloc.start()
+        try:
+            _run_pipeline(g, symbols, exact, traced)
+        finally:
+            tracemalloc.stop()
+    return results
+
+
+def find_regressions(results, baseline, tolerance=0.25, min_delta=0.005):
+    """
+    Compare stage timings against a stored baseline.
+
+    Parameters:
+    results (dict): metric -> stage -> {'seconds', ...} as from benchmark_metric().
+    baseline (dict): metric -> stage -> seconds.
+    tolerance (float): Allowed relative slowdown.
+    min_delta (float): Slowdowns below this many seconds are treated as noise.
+
+    Returns:
+    list of str: One message per regressed stage.
+    """
+    regressions = []
+    for metric, stages in results.items():
+        for stage, entry in stages.items():
+            reference = baseline.get(metric, {}).get(stage)
+            if reference is None:
+                continue
+            seconds = entry['seconds']
+            if seconds > reference * (1 + tolerance) and seconds - reference > min_delta:
+                regressions.append(f"{metric}/{stage}: {seconds * 1e3:.1f} ms vs baseline "
+                                   f"{reference * 1e3:.1f} ms (+{(seconds / reference - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_report(results):
+    print(f"{'metric':<20}{'stage':<13}{'time (ms)':>12}{'nodes':>12}{'peak (KiB)':>13}")
+    for metric, stages in results.items():
+        for stage, entry in stages.items():
+            nodes = '-' if entry['nodes'] is None else entry['nodes']
+            peak = '-' if entry['peak_bytes'] is None else f"{entry['peak_bytes'] / 1024:.0f}"
+            print(f"{metric:<20}{stage:<13}{entry['seconds'] * 1e3:>12.1f}{nodes:>12}{peak:>13}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the curvature pipeline stage by stage.")
+    parser.add_argument('--metrics', nargs='+', choices=sorted(METRICS), default=list(METRICS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--exact', action='store_true', help="run christoffel() in exact-rational mode")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc run")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="store these timings as the baseline")
+    parser.add_argument('--check', action='store_true', help="exit with status 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--min-delta', type=float, default=0.005)
+    args = parser.parse_args(argv)
+    # Fail before the (slow) benchmark runs when there is nothing to check against
+    if args.check and not os.path.exists(args.baseline):
+        parser.error(f"no baseline at {args.baseline}; record one with --save-baseline first")
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {name: benchmark_metric(name, args.repeat, args.exact, not args.no_memory) for name in args.metrics}
+    print_report(results)
+
+    # Check against the stored timings before --save-baseline replaces them
+    if args.check:
+        regressions = find_regressions(results, baseline, args.tolerance, args.min_delta)
+        for message in regressions:
+            print("REGRESSION", message)
+        if regressions:
+            if args.save_baseline:
+                print("Baseline not updated")
+            return 1
+        print("No regressions against", args.baseline)
+
+    if args.save_baseline:
+        for metric, stages in results.items():
+            baseline[metric] = {stage: entry['seconds'] for stage, entry in stages.items()}
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
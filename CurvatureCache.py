@@ -0,0 +1,220 @@
+"""
+Persistent on-disk cache for derived curvature tensors.
+
+Entries are content-addressed: the key is a hash of the metric matrix and the
+coordinate symbols, so the same metric always maps to the same file no matter
+which script built it. Each entry holds whatever the caller computed (for the
+Schwarzschild script: the inverse metric, Christoffel symbols, Ricci tensor
+and Ricci scalar) as a zlib-compressed pickle.
+
+The cache is capped in size and evicts the least recently used entries first;
+reads refresh an entry's modification time, which serves as its LRU stamp.
+Writes go through a temporary file and an atomic rename, and eviction runs
+under an exclusive file lock, so several worker processes can share one
+cache directory. Temporary files orphaned by an interrupted write count
+towards the size cap and are removed by eviction once they are stale.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+
+import sympy as sp
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked eviction
+    fcntl = None
+
+# Bump when the layout of cached entries changes
+CACHE_FORMAT = 2
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'CURVATURE_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'SpringTheory', 'curvature'))
+
+
+class CurvatureCache:
+    """
+    Size-capped, content-addressed on-disk cache of curvature tensors.
+
+    Parameters:
+    directory (str): Where entries are stored; defaults to $CURVATURE_CACHE_DIR
+        or ~/.cache/SpringTheory/curvature.
+    max_bytes (int): Total size above which least recently used entries are evicted.
+    stale_seconds (float): Age after which a temporary file is taken to be left
+        over from an interrupted write and removed.
+    """
+
+    suffix = '.curv'
+    temp_suffix = '.tmp'
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024, stale_seconds=3600.0):
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.stale_seconds = stale_seconds
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, g, symbols, variant=''):
+        """
+        Hash a metric and its coordinates into a cache key.
+
+        Parameters:
+        g (sympy Matrix): The metric.
+        symbols (sequence of sympy Symbols): The coordinates.
+        variant (str): Distinguishes entries derived differently from the same metric.
+
+        Returns:
+        str: The hex digest identifying the metric.
+        """
+        content = '\n'.join([
+            str(CACHE_FORMAT),
+            sp.__version__,
+            sp.srepr(sp.ImmutableMatrix(g)),
+            sp.srepr(tuple(symbols)),
+            variant,
+        ])
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key):
+        """
+        Load an entry, or return None on a miss.
+
+        Parameters:
+        key (str): The cache key.
+
+        Returns:
+        dict or None: The cached tensors.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            value = pickle.loads(zlib.decompress(data))
+        except Exception:
+            # Truncated or written by an incompatible version; drop it
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def put(self, key, value):
+        """
+        Store an entry atomically and evict old entries if over the size cap.
+
+        Parameters:
+        key (str): The cache key.
+        value (dict): The tensors to store.
+        """
+        data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=self.temp_suffix)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+    def get_or_compute(self, g, symbols, compute):
+        """
+        Return the cached tensors for a metric, computing and storing them on a miss.
+
+        Parameters:
+        g (sympy Matrix): The metric.
+        symbols (sequence of sympy Symbols): The coordinates.
+        compute (callable): Called with no arguments on a miss; returns the dict to cache.
+
+        Returns:
+        dict: The cached or freshly computed tensors.
+        """
+        key = self.key(g, symbols)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+
+        Temporary files older than stale_seconds are removed first. Younger
+        ones may be writes in progress in another process: they count towards
+        the size but are left alone.
+        """
+        with self._lock():
+            entries = []
+            total = 0
+            stale_before = time.time() - self.stale_seconds
+            for name in os.listdir(self.directory):
+                if not name.endswith((self.suffix, self.temp_suffix)):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if name.endswith(self.temp_suffix):
+                    if stat.st_mtime < stale_before:
+                        self._remove(path)
+                    else:
+                        total += stat.st_size
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            total += sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(os.path.join(self.directory, name))
+                total -= size
+
+    def clear(self):
+        """
+        Remove every entry, and temporary files left over from interrupted writes.
+        """
+        stale_before = time.time() - self.stale_seconds
+        with self._lock():
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if name.endswith(self.temp_suffix):
+                    try:
+                        if os.stat(path).st_mtime < stale_before:
+                            self._remove(path)
+                    except FileNotFoundError:
+                        pass
+                elif name.endswith(self.suffix):
+                    self._remove(os.path.join(self.directory, name))
+
+    @contextmanager
+    def _lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
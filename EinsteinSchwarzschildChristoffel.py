@@ -1,498 +1,780 @@
 """
-⎡                                              ⎡        ⎛          2  ⎞       
-⎢                                              ⎢1.0⋅G⋅M⋅⎝-2⋅G⋅M + c ⋅r⎠
-⎢                                              ⎢───────────────────────
-⎢                                              ⎢          4  3
-⎢                                              ⎢         c ⋅r
-⎢                                              ⎢
-⎢                                              ⎢
-⎢⎡                        1.0⋅G⋅M           ⎤  ⎢                         -1.0⋅
-⎢⎢        0          ─────────────────  0  0⎥  ⎢           0             ─────
-⎢⎢                     ⎛          2  ⎞      ⎥  ⎢
-⎢⎢                   r⋅⎝-2⋅G⋅M + c ⋅r⎠      ⎥  ⎢                             4
-⎢⎢                                          ⎥  ⎢                            c
-⎢⎢     1.0⋅G⋅M                              ⎥  ⎢
-⎢⎢─────────────────          0          0  0⎥  ⎢
-⎢⎢  ⎛          2  ⎞                         ⎥  ⎢
-⎢⎢r⋅⎝-2⋅G⋅M + c ⋅r⎠                         ⎥  ⎢
-⎢⎢                                          ⎥  ⎢
-⎢⎢        0                  0          0  0⎥  ⎢           0
-⎢⎢                                          ⎥  ⎢
-⎢⎣        0                  0          0  0⎦  ⎢
-⎢                                              ⎢
-⎢                                              ⎢
-⎢                                              ⎢
-⎢                                              ⎢           0
-⎢                                              ⎢
-⎣                                              ⎣
-
-                                                                          ⎤
-                                                                          ⎥
-       0                        0                          0              ⎥
-                                                                          ⎥
-                                                                          ⎥
-                                                                          ⎥
-    ⎛          2  ⎞                                                       ⎥
-G⋅M⋅⎝-2⋅G⋅M + c ⋅r⎠                                                       ⎥
-────────────────────            0                          0              ⎥  ⎡
-                 2                                                        ⎥  ⎢
-  3 ⎛  2⋅G⋅M    ⎞                                                         ⎥  ⎢
-⋅r ⋅⎜- ───── + 1⎟                                                         ⎥  ⎢
-    ⎜    2      ⎟                                                         ⎥  ⎢
-    ⎝   c ⋅r    ⎠                                                         ⎥  ⎢
-                                                                          ⎥  ⎢
-                           ⎛          2  ⎞                                ⎥  ⎢
-                      -1.0⋅⎝-2⋅G⋅M + c ⋅r⎠                                ⎥  ⎢
-       0              ─────────────────────                0              ⎥  ⎢
-                                 2                                        ⎥  ⎣
-                                c                                         ⎥
-                                                                          ⎥
-                                                  ⎛          2  ⎞    2    ⎥
-                                             -1.0⋅⎝-2⋅G⋅M + c ⋅r⎠⋅sin (θ) ⎥
-       0                        0            ─────────────────────────────⎥
-                                                            2             ⎥
-                                                           c              ⎦
-
-                                                                  ⎤
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎥
-                                  ⎡0   0       0           0     ⎤⎥
-0   0    0           0         ⎤  ⎢                              ⎥⎥
-                               ⎥  ⎢                       1.0    ⎥⎥
-        1.0                    ⎥  ⎢0   0       0          ───    ⎥⎥
-0   0   ───          0         ⎥  ⎢                        r     ⎥⎥
-         r                     ⎥  ⎢                              ⎥⎥
-                               ⎥  ⎢                    1.0⋅cos(θ)⎥⎥
-   1.0                         ⎥  ⎢0   0       0       ──────────⎥⎥
-0  ───   0           0         ⎥  ⎢                      sin(θ)  ⎥⎥
-    r                          ⎥  ⎢                              ⎥⎥
-                               ⎥  ⎢   1.0  1.0⋅cos(θ)            ⎥⎥
-0   0    0   -1.0⋅sin(θ)⋅cos(θ)⎦  ⎢0  ───  ──────────      0     ⎥⎥
-                                  ⎣    r     sin(θ)              ⎦⎥
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎦
-"""
-
-import sympy as sp
+Symbolic connection and curvature of spacetime metrics.
 
-# Define the symbols for the Einstein field equations
-R, g, T = sp.symbols('R g T', cls=sp.Function)
-G, c, pi = sp.symbols('G c pi')
-mu, nu = sp.symbols('mu nu')
+Importing this module only defines functions and symbols; nothing is derived
+until it is asked for. Metric objects compute their inverse, Christoffel
+symbols and curvature tensors lazily, the first time each one is accessed,
+and reuse the on-disk CurvatureCache across runs.
 
-# Define the Einstein field equations
-einstein_eq = sp.Eq(R(mu, nu) - 1/2 * R(g(mu, nu)), 8 * pi * G / c**4 * T(mu, nu))
+    >>> from EinsteinSchwarzschildChristoffel import schwarzschild_metric
+    >>> metric = schwarzschild_metric()
+    >>> Gamma = metric.christoffel                 # derived (or loaded) on first access
+    >>> Gamma_numeric = metric.numeric('christoffel', (r, theta, M, G, c))
 
-# Display the Einstein field equations
-print("Einstein field equations:", einstein_eq)
-# Eq(-0.5*R(g(mu, nu)) + R(mu, nu), 8*G*pi*T(mu, nu)/c**4)
-sp.pprint(einstein_eq)
-"""
-                            8⋅G⋅π⋅T(μ, ν)
--0.5⋅R(g(μ, ν)) + R(μ, ν) = ─────────────
-                                   4
-                                  c
+The walkthrough that prints the Schwarzschild derivation lives in
+SchwarzschildDemo.py (also run by executing this file).
 """
 
-# Define the Schwarzschild metric components
-t, r, theta, phi, M = sp.symbols('t r theta phi M')
-G, c = sp.symbols('G c')
-g_tt = -(1 - 2*G*M/(c**2*r))
-g_rr = (1 - 2*G*M/(c**2*r))**(-1)
-g_thth = r**2
-g_phiphi = r**2 * sp.sin(theta)**2
-
-# Display the metric components
-print("Schwarzschild metric components:")
-
-sp.pprint("g_tt:", g_tt)                
-# (2*G*M/(c**2*r) - 1)
-# 2⋅G⋅M
-# ───── - 1
-#   2
-#  c ⋅r
-
-sp.pprint(g_tt)
-# 2⋅G⋅M
-# ───── - 1
-#   2
-#  c ⋅r
-
-sp.pprint(g_rr)                
-# (1/(-2*G*M/(c**2*r) + 1))
-#     1
-#───────────
-#  2⋅G⋅M
-#- ───── + 1
-#    2
-#   c ⋅r
-
-sp.pprint(g_thth)            
-# (r**2)
-#  2
-# r
-
-sp.pprint(g_phiphi)        
-# (r**2*sin(theta)**2)
-#  2    2
-# r ⋅sin (θ)
-
-
-# Define the Schwarzschild metric as a matrix
-g = sp.Matrix([
-    [g_tt, 0, 0, 0],
-    [0, g_rr, 0, 0],
-    [0, 0, g_thth, 0],
-    [0, 0, 0, g_phiphi]
-])
-
-"""
-⎡2⋅G⋅M                                 ⎤
-⎢───── - 1       0       0       0     ⎥
-⎢  2                                   ⎥
-⎢ c ⋅r                                 ⎥
-⎢                                      ⎥
-⎢                1                     ⎥
-⎢    0      ───────────  0       0     ⎥
-⎢             2⋅G⋅M                    ⎥
-⎢           - ───── + 1                ⎥
-⎢               2                      ⎥
-⎢              c ⋅r                    ⎥
-⎢                                      ⎥
-⎢                         2            ⎥
-⎢    0           0       r       0     ⎥
-⎢                                      ⎥
-⎢                             2    2   ⎥
-⎣    0           0       0   r ⋅sin (θ)⎦
-"""
+import itertools
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 
-# Define the inverse metric
-g_inv = g.inv()
+import numpy as np
+import sympy as sp
+from sympy.simplify.fu import TR6
 
-"""
-⎡      2                                     ⎤
-⎢    -c ⋅r                                   ⎥
-⎢─────────────        0        0       0     ⎥
-⎢          2                                 ⎥
-⎢-2⋅G⋅M + c ⋅r                               ⎥
-⎢                                            ⎥
-⎢                         2                  ⎥
-⎢               -2⋅G⋅M + c ⋅r                ⎥
-⎢      0        ─────────────  0       0     ⎥
-⎢                     2                      ⎥
-⎢                    c ⋅r                    ⎥
-⎢                                            ⎥
-⎢                              1             ⎥
-⎢      0              0        ──      0     ⎥
-⎢                               2            ⎥
-⎢                              r             ⎥
-⎢                                            ⎥
-⎢                                      1     ⎥
-⎢      0              0        0   ──────────⎥
-⎢                                   2    2   ⎥
-⎣                                  r ⋅sin (θ)⎦
-"""
+from CurvatureCache import CurvatureCache
 
+# Coordinates and parameters of the Schwarzschild solution
+t, r, theta, phi, M = sp.symbols('t r theta phi M')
+G, c = sp.symbols('G c')
+symbols = (t, r, theta, phi)
+
+# Dense n-dimensional array of sympy zeros; NDimArray.zeros() fills with Python int 0,
+# which has no .subs() or .free_symbols for applyfunc() and friends
+def _zeros(*shape):
+    return sp.MutableDenseNDimArray([sp.S.Zero] * int(np.prod(shape)), shape)
+
+# Sparse storage for connection and curvature components
+class SparseTensor:
+    """
+    Tensor that stores only its non-zero independent components.
+
+    Index symmetries are declared as pairs of axes. A component is stored
+    under its canonical index, with the index in each symmetric or
+    antisymmetric pair sorted, so the Schwarzschild Christoffel symbols
+    (symmetric in their lower indices) need 9 entries instead of 64.
+    Indexing any component, including mirrored and zero ones, works as on a
+    dense array.
+
+    Parameters:
+    shape (tuple of int): The dimensions of the tensor.
+    components (dict): Index tuple -> expression. Zero entries are dropped.
+    symmetric (sequence of pairs): Axes the tensor is symmetric in, e.g.
+        ((1, 2),) for Gamma^k_ij.
+    antisymmetric (sequence of pairs): Axes the tensor is antisymmetric in,
+        e.g. ((2, 3),) for R^rho_{sigma mu nu}.
+    """
+
+    def __init__(self, shape, components=None, symmetric=(), antisymmetric=()):
+        self.shape = tuple(shape)
+        self.symmetric = tuple(tuple(pair) for pair in symmetric)
+        self.antisymmetric = tuple(tuple(pair) for pair in antisymmetric)
+        self._data = {}
+        self._lookups = {}
+        for index, expr in (components or {}).items():
+            self[index] = expr
+
+    @classmethod
+    def from_array(cls, array, symmetric=(), antisymmetric=()):
+        """
+        Collect the non-zero components of a dense array or matrix.
+        """
+        shape = tuple(array.shape)
+        tensor = cls(shape, symmetric=symmetric, antisymmetric=antisymmetric)
+        for index in itertools.product(*[range(n) for n in shape]):
+            key, sign = tensor._canonical(index)
+            if key == index and sign:
+                expr = array[index]
+                if expr != 0:
+                    tensor._data[key] = sp.sympify(expr)
+        return tensor
+
+    def _canonical(self, index):
+        # (canonical index, sign); sign 0 marks a component forced to vanish
+        index = list(index)
+        sign = 1
+        for a, b in self.symmetric:
+            if index[a] > index[b]:
+                index[a], index[b] = index[b], index[a]
+        for a, b in self.antisymmetric:
+            if index[a] > index[b]:
+                index[a], index[b] = index[b], index[a]
+                sign = -sign
+            elif index[a] == index[b]:
+                sign = 0
+        return tuple(index), sign
+
+    def __getitem__(self, index):
+        key, sign = self._canonical(index)
+        expr = self._data.get(key) if sign else None
+        if expr is None:
+            return sp.S.Zero
+        return expr if sign > 0 else -expr
+
+    def __setitem__(self, index, expr):
+        key, sign = self._canonical(index)
+        expr = sp.sympify(expr)
+        if not sign:
+            if expr != 0:
+                raise ValueError(f"Component {tuple(index)} must vanish by antisymmetry")
+            return
+        if expr == 0:
+            self._data.pop(key, None)
+        else:
+            self._data[key] = expr if sign > 0 else -expr
+        self._lookups.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def independent(self):
+        """
+        Iterate over the stored (canonical index, expression) pairs.
+        """
+        return iter(self._data.items())
+
+    def nonzero(self):
+        """
+        Iterate over every non-zero (index, expression) pair, mirrored ones included.
+        """
+        for key, expr in self._data.items():
+            images = {key: expr}
+            for a, b in self.symmetric + self.antisymmetric:
+                for index, value in list(images.items()):
+                    swapped = list(index)
+                    swapped[a], swapped[b] = swapped[b], swapped[a]
+                    images.setdefault(tuple(swapped), value if (a, b) in self.symmetric else -value)
+            yield from images.items()
+
+    def lookup(self, axes):
+        """
+        Group the non-zero components by their indices on some axes.
+
+        Contractions use this to visit only the components that can
+        contribute, e.g. lookup((1, 2))[(i, j)] lists every non-zero
+        Gamma^k_ij for fixed i and j. The grouping is built once and kept
+        until the tensor is modified.
+
+        Parameters:
+        axes (tuple of int): The axes to group by.
+
+        Returns:
+        dict: Tuple of indices on axes -> list of (full index, expression).
+        """
+        axes = tuple(axes)
+        if axes not in self._lookups:
+            groups = {}
+            for index, expr in sorted(self.nonzero(), key=lambda item: item[0]):
+                groups.setdefault(tuple(index[a] for a in axes), []).append((index, expr))
+            self._lookups[axes] = groups
+        return self._lookups[axes]
+
+    def applyfunc(self, f):
+        """
+        Apply f to every stored component, dropping those that become zero.
+        """
+        out = SparseTensor(self.shape, symmetric=self.symmetric, antisymmetric=self.antisymmetric)
+        for key, expr in self._data.items():
+            value = f(expr)
+            if value != 0:
+                out._data[key] = value
+        return out
+
+    def to_array(self):
+        out = _zeros(*self.shape)
+        for index, expr in self.nonzero():
+            out[index] = expr
+        return out
+
+    def tolist(self):
+        return self.to_array().tolist()
+
+    def __getstate__(self):
+        # Lookups are rebuilt on demand, e.g. once per pool worker
+        return {key: value for key, value in self.__dict__.items() if key != '_lookups'}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, _lookups={})
+
+    def __eq__(self, other):
+        if isinstance(other, SparseTensor):
+            return self.shape == other.shape and dict(self.nonzero()) == dict(other.nonzero())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __str__(self):
+        return str(self.to_array())
+
+    __repr__ = __str__
 
 # Define the Christoffel symbols
-def christoffel(g, g_inv):
-    symbols = sp.symbols('t r theta phi')
-    Gamma = sp.MutableDenseNDimArray.zeros(4, 4, 4)
-    for k in range(4):
-        for i in range(4):
-            for j in range(4):
-                Gamma[k, i, j] = 0.5 * sum([g_inv[k, l] * (sp.diff(g[l, i], symbols[j]) +
-                                                          sp.diff(g[l, j], symbols[i]) -
-                                                          sp.diff(g[i, j], symbols[l])) for l in range(4)])
-    return Gamma
-
-# Redefine the symbols correctly
-symbols = sp.symbols('t r theta phi')
-
-# Recompute the Christoffel symbols
-Gamma = christoffel(g, g_inv)
-# [[[0, 1.0*G*M/(r*(-2*G*M + c**2*r)), 0, 0], [1.0*G*M/(r*(-2*G*M + c**2*r)), 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]], [[1.0*G*M*(-2*G*M + c**2*r)/(c**4*r**3), 0, 0, 0], [0, -1.0*G*M*(-2*G*M + c**2*r)/(c**4*r**3*(-2*G*M/(c**2*r) + 1)**2), 0, 0], [0, 0, -1.0*(-2*G*M + c**2*r)/c**2, 0], [0, 0, 0, -1.0*(-2*G*M + c**2*r)*sin(theta)**2/c**2]], [[0, 0, 0, 0], [0, 0, 1.0/r, 0], [0, 1.0/r, 0, 0], [0, 0, 0, -1.0*sin(theta)*cos(theta)]], [[0, 0, 0, 0], [0, 0, 0, 1.0/r], [0, 0, 0, 1.0*cos(theta)/sin(theta)], [0, 1.0/r, 1.0*cos(theta)/sin(theta), 0]]]
-
-# Display the Christoffel symbols
-print("Christoffel symbols:")
-print("Gamma_ttt:", Gamma[0, 0, 0])     # Gamma_ttt: 0
-print("Gamma_trr:", Gamma[0, 1, 1])     # Gamma_trr: 0
-print("Gamma_tth:", Gamma[0, 2, 2])     # Gamma_tth: 0
-print("Gamma_tph:", Gamma[0, 3, 3])     # Gamma_tph: 0
-print("\n")
-print("Display the full Christoffel symbols matrix:")
-print(Gamma)
-# [[[0, 1.0*G*M/(r*(-2*G*M + c**2*r)), 0, 0], [1.0*G*M/(r*(-2*G*M + c**2*r)), 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]], [[1.0*G*M*(-2*G*M + c**2*r)/(c**4*r**3), 0, 0, 0], [0, -1.0*G*M*(-2*G*M + c**2*r)/(c**4*r**3*(-2*G*M/(c**2*r) + 1)**2), 0, 0], [0, 0, -1.0*(-2*G*M + c**2*r)/c**2, 0], [0, 0, 0, -1.0*(-2*G*M + c**2*r)*sin(theta)**2/c**2]], [[0, 0, 0, 0], [0, 0, 1.0/r, 0], [0, 1.0/r, 0, 0], [0, 0, 0, -1.0*sin(theta)*cos(theta)]], [[0, 0, 0, 0], [0, 0, 0, 1.0/r], [0, 0, 0, 1.0*cos(theta)/sin(theta)], [0, 1.0/r, 1.0*cos(theta)/sin(theta), 0]]]
-sp.pprint(Gamma)
-"""
-⎡                                              ⎡        ⎛          2  ⎞       
-⎢                                              ⎢1.0⋅G⋅M⋅⎝-2⋅G⋅M + c ⋅r⎠
-⎢                                              ⎢───────────────────────
-⎢                                              ⎢          4  3
-⎢                                              ⎢         c ⋅r
-⎢                                              ⎢
-⎢                                              ⎢
-⎢⎡                        1.0⋅G⋅M           ⎤  ⎢                         -1.0⋅
-⎢⎢        0          ─────────────────  0  0⎥  ⎢           0             ─────
-⎢⎢                     ⎛          2  ⎞      ⎥  ⎢
-⎢⎢                   r⋅⎝-2⋅G⋅M + c ⋅r⎠      ⎥  ⎢                             4
-⎢⎢                                          ⎥  ⎢                            c
-⎢⎢     1.0⋅G⋅M                              ⎥  ⎢
-⎢⎢─────────────────          0          0  0⎥  ⎢
-⎢⎢  ⎛          2  ⎞                         ⎥  ⎢
-⎢⎢r⋅⎝-2⋅G⋅M + c ⋅r⎠                         ⎥  ⎢
-⎢⎢                                          ⎥  ⎢
-⎢⎢        0                  0          0  0⎥  ⎢           0
-⎢⎢                                          ⎥  ⎢
-⎢⎣        0                  0          0  0⎦  ⎢
-⎢                                              ⎢
-⎢                                              ⎢
-⎢                                              ⎢
-⎢                                              ⎢           0
-⎢                                              ⎢
-⎣                                              ⎣
-
-                                                                          ⎤
-                                                                          ⎥
-       0                        0                          0              ⎥
-                                                                          ⎥
-                                                                          ⎥
-                                                                          ⎥
-    ⎛          2  ⎞                                                       ⎥
-G⋅M⋅⎝-2⋅G⋅M + c ⋅r⎠                                                       ⎥
-────────────────────            0                          0              ⎥  ⎡
-                 2                                                        ⎥  ⎢
-  3 ⎛  2⋅G⋅M    ⎞                                                         ⎥  ⎢
-⋅r ⋅⎜- ───── + 1⎟                                                         ⎥  ⎢
-    ⎜    2      ⎟                                                         ⎥  ⎢
-    ⎝   c ⋅r    ⎠                                                         ⎥  ⎢
-                                                                          ⎥  ⎢
-                           ⎛          2  ⎞                                ⎥  ⎢
-                      -1.0⋅⎝-2⋅G⋅M + c ⋅r⎠                                ⎥  ⎢
-       0              ─────────────────────                0              ⎥  ⎢
-                                 2                                        ⎥  ⎣
-                                c                                         ⎥
-                                                                          ⎥
-                                                  ⎛          2  ⎞    2    ⎥
-                                             -1.0⋅⎝-2⋅G⋅M + c ⋅r⎠⋅sin (θ) ⎥
-       0                        0            ─────────────────────────────⎥
-                                                            2             ⎥
-                                                           c              ⎦
-
-                                                                  ⎤
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎥
-                                  ⎡0   0       0           0     ⎤⎥
-0   0    0           0         ⎤  ⎢                              ⎥⎥
-                               ⎥  ⎢                       1.0    ⎥⎥
-        1.0                    ⎥  ⎢0   0       0          ───    ⎥⎥
-0   0   ───          0         ⎥  ⎢                        r     ⎥⎥
-         r                     ⎥  ⎢                              ⎥⎥
-                               ⎥  ⎢                    1.0⋅cos(θ)⎥⎥
-0  ───   0           0         ⎥  ⎢                      sin(θ)  ⎥⎥
-    r                          ⎥  ⎢                              ⎥⎥
-                               ⎥  ⎢   1.0  1.0⋅cos(θ)            ⎥⎥
-0   0    0   -1.0⋅sin(θ)⋅cos(θ)⎦  ⎢0  ───  ──────────      0     ⎥⎥
-                                  ⎣    r     sin(θ)              ⎦⎥
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎥
-                                                                  ⎦
-                                                                  
-"""
+def christoffel(g, g_inv, symbols=None, exact=False, sparse=False):
+    """
+    Compute the Christoffel symbols of the second kind, Gamma^k_ij.
+
+    Each metric partial derivative is taken once and cached, only the
+    independent components with i <= j are summed (the rest are mirrored),
+    and zero entries of the metric and its inverse are skipped, so diagonal
+    and sparse metrics only pay for their non-zero blocks.
+
+    Parameters:
+    g (sympy Matrix): The n x n metric.
+    g_inv (sympy Matrix): The inverse metric.
+    symbols (sequence of sympy Symbols): The coordinates; defaults to (t, r, theta, phi).
+    exact (bool): Use the Rational 1/2 instead of the float 0.5, so no Float
+        coefficients leak into the result.
+    sparse (bool): Return the SparseTensor of non-zero components instead of
+        a dense array.
+
+    Returns:
+    sympy MutableDenseNDimArray or SparseTensor: Gamma[k, i, j].
+    """
+    n = g.shape[0]
+    if symbols is None:
+        symbols = sp.symbols('t r theta phi')
+    if len(symbols) != n:
+        raise ValueError(f"Expected {n} coordinate symbols, got {len(symbols)}")
+
+    # d_x g_ab, computed at most once per (unordered) metric entry and coordinate
+    dg = {}
+
+    def metric_diff(a, b, x):
+        key = (min(a, b), max(a, b), x)
+        if key not in dg:
+            component = g[a, b]
+            if component == 0 or not component.has(symbols[x]):
+                dg[key] = sp.S.Zero
+            else:
+                dg[key] = sp.diff(component, symbols[x])
+        return dg[key]
+
+    inv_nonzero = [[l for l in range(n) if g_inv[k, l] != 0] for k in range(n)]
+    half = sp.Rational(1, 2) if exact else 0.5
+
+    Gamma = SparseTensor((n, n, n), symmetric=[(1, 2)])
+    for i in range(n):
+        for j in range(i, n):
+            # Christoffel symbols of the first kind, Gamma_lij, shared by every k
+            first_kind = {}
+            for l in range(n):
+                bracket = metric_diff(l, i, j) + metric_diff(l, j, i) - metric_diff(i, j, l)
+                if bracket != 0:
+                    first_kind[l] = bracket
+            if not first_kind:
+                continue
+            for k in range(n):
+                terms = [g_inv[k, l] * first_kind[l] for l in inv_nonzero[k] if l in first_kind]
+                if terms:
+                    Gamma[k, i, j] = half * sum(terms)
+    return Gamma if sparse else Gamma.to_array()
+
+
+# Replace Float coefficients by the Rationals they stand for
+def rationalize(expr):
+    expr = sp.sympify(expr)
+    return sp.nsimplify(expr, rational=True) if expr.has(sp.Float) else expr
+
+# Cheap canonical form applied between pipeline stages
+def canonicalize(expr):
+    """
+    Put an expression over a common denominator and cancel common factors.
+
+    Even powers of cosines are rewritten in terms of sines first, so
+    sin**2 + cos**2 collapses without a full trigsimp. This is cheap compared
+    to sp.simplify and keeps expressions from growing from one stage of the
+    pipeline to the next.
+
+    Parameters:
+    expr (sympy expression): The expression.
+
+    Returns:
+    sympy expression: The canonicalized expression.
+    """
+    expr = sp.sympify(expr)
+    if expr.is_Atom:
+        return expr
+    expr = sp.cancel(expr)
+    if expr.has(sp.cos):
+        expr = sp.cancel(TR6(expr, max=sp.oo))
+    return expr
+
+class SimplificationTimeout(Exception):
+    pass
+
+def simplify_with_budget(expr, budget=None):
+    """
+    Run sp.simplify, giving up after budget seconds.
+
+    The budget is enforced with an interval timer, which is only available in
+    the main thread on POSIX systems; elsewhere the expression is returned
+    canonicalized but otherwise unsimplified.
+
+    Parameters:
+    expr (sympy expression): The expression.
+    budget (float): Seconds to allow; None for no limit.
+
+    Returns:
+    sympy expression: The simplified expression, or its canonical form if the
+    budget ran out (or the input itself, if even that did not finish).
+    """
+    if budget is None:
+        return sp.simplify(expr)
+    if not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        return canonicalize(expr)
+
+    def on_timeout(signum, frame):
+        raise SimplificationTimeout
+
+    previous = signal.signal(signal.SIGALRM, on_timeout)
+    # A timer the caller had running is suspended meanwhile (and cuts the budget short if it is due sooner)
+    start = time.monotonic()
+    outer_delay, outer_interval = signal.setitimer(signal.ITIMER_REAL, budget)
+    if outer_delay and outer_delay < budget:
+        signal.setitimer(signal.ITIMER_REAL, outer_delay)
+    try:
+        expr = canonicalize(expr)
+        return sp.simplify(expr)
+    except SimplificationTimeout:
+        return expr
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+        if outer_delay:
+            # Re-arm it with what is left; a timer already due fires straight away
+            signal.setitimer(signal.ITIMER_REAL, max(outer_delay - (time.monotonic() - start), 1e-6),
+                             outer_interval)
+
+def _reduce_component(expr, simplify=False, budget=None):
+    if simplify == 'canonical':
+        return canonicalize(expr)
+    if simplify:
+        return simplify_with_budget(expr, budget)
+    return expr
+
+class LazyTensor:
+    """
+    Tensor whose components are only fully simplified when requested.
+
+    Components are stored as given (normally already canonicalized) and
+    indexing runs simplify_with_budget on the requested component the first
+    time it is seen. Results are memoized by expression, so mirrored
+    components of symmetric tensors are simplified once.
+
+    Parameters:
+    array (sympy NDimArray or SparseTensor): The components; sparse ones stay sparse.
+    budget (float): Seconds allowed per component simplification; None for no limit.
+    simplified (bool): The components are already fully simplified.
+    """
+
+    def __init__(self, array, budget=10.0, simplified=False):
+        self._raw = array if isinstance(array, SparseTensor) else sp.MutableDenseNDimArray(array)
+        self.shape = tuple(self._raw.shape)
+        self.budget = budget
+        self.simplified = simplified
+        self._memo = {}
+
+    def raw(self, index):
+        return self._raw[index]
+
+    def __getitem__(self, index):
+        expr = self._raw[index]
+        if self.simplified or expr.is_Atom:
+            return expr
+        if expr not in self._memo:
+            self._memo[expr] = simplify_with_budget(expr, self.budget)
+        return self._memo[expr]
+
+    def as_array(self):
+        out = _zeros(*self.shape)
+        for index in itertools.product(*[range(n) for n in self.shape]):
+            out[index] = self[index]
+        return out
+
+    def tolist(self):
+        return self.as_array().tolist()
+
+    def __str__(self):
+        return str(self.as_array())
+
+    __repr__ = __str__
+
+# Component kernels shared by the serial and process-pool code paths. Gamma is a
+# SparseTensor, so each sum only visits products of two non-zero components.
+def _ricci_component(Gamma, symbols, i, j):
+    # R_ij = d_k Gamma^k_ij - d_j Gamma^k_ik + Gamma^l_ij Gamma^k_lk - Gamma^l_ik Gamma^k_lj
+    by_lower = Gamma.lookup((1, 2))
+    by_first_lower = Gamma.lookup((1,))
+    terms = []
+    for (k, _, _), expr in by_lower.get((i, j), ()):
+        terms.append(sp.diff(expr, symbols[k]))
+    for (k, _, m), expr in by_first_lower.get((i,), ()):
+        if m == k:
+            terms.append(-sp.diff(expr, symbols[j]))
+    for (l, _, _), first in by_lower.get((i, j), ()):
+        for (k, _, m), second in by_first_lower.get((l,), ()):
+            if m == k:
+                terms.append(first * second)
+    for (l, _, k), first in by_first_lower.get((i,), ()):
+        second = Gamma[k, l, j]
+        if second != 0:
+            terms.append(-(first * second))
+    return sp.Add(*terms)
+
+def _riemann_component(Gamma, symbols, rho, sigma, mu, nu):
+    # R^rho_{sigma mu nu} = d_mu Gamma^rho_nu sigma - d_nu Gamma^rho_mu sigma
+    #                       + Gamma^rho_mu l Gamma^l_nu sigma - Gamma^rho_nu l Gamma^l_mu sigma
+    by_upper_first = Gamma.lookup((0, 1))
+    terms = [sp.diff(Gamma[rho, nu, sigma], symbols[mu]), -sp.diff(Gamma[rho, mu, sigma], symbols[nu])]
+    for (_, _, l), first in by_upper_first.get((rho, mu), ()):
+        second = Gamma[l, nu, sigma]
+        if second != 0:
+            terms.append(first * second)
+    for (_, _, l), first in by_upper_first.get((rho, nu), ()):
+        second = Gamma[l, mu, sigma]
+        if second != 0:
+            terms.append(-(first * second))
+    return sp.Add(*terms)
+
+_COMPONENT_KERNELS = {'ricci': _ricci_component, 'riemann': _riemann_component}
+
+# Per-worker copy of the connection, sent once by the pool initializer
+_worker_state = {}
+
+def _init_component_worker(Gamma, symbols, simplify, budget):
+    _worker_state.update(Gamma=Gamma, symbols=symbols, simplify=simplify, budget=budget)
+
+def _component_task(task):
+    kind, index = task
+    expr = _COMPONENT_KERNELS[kind](_worker_state['Gamma'], _worker_state['symbols'], *index)
+    return index, _reduce_component(expr, _worker_state['simplify'], _worker_state['budget'])
+
+def _compute_components(kind, indices, Gamma, symbols, processes=1, simplify=False, budget=None):
+    """
+    Evaluate the independent components of a curvature tensor, optionally in a process pool.
+
+    Parameters:
+    kind (str): 'ricci' or 'riemann'.
+    indices (list of tuples): The independent index combinations to compute.
+    Gamma (sympy NDimArray or SparseTensor): The Christoffel symbols.
+    symbols (sequence of sympy Symbols): The coordinates.
+    processes (int or None): Worker processes; 1 runs serially, None uses every core.
+    simplify (bool or str): False keeps raw components, 'canonical' applies
+        canonicalize() and True runs simplify_with_budget(), in the worker that
+        derived the component.
+    budget (float): Seconds allowed per component when simplify is True.
+
+    Returns:
+    list of tuples: (index, expression) pairs in the order of indices.
+    """
+    if not isinstance(Gamma, SparseTensor):
+        Gamma = SparseTensor.from_array(Gamma)
+    if processes == 1 or len(indices) < 2:
+        _init_component_worker(Gamma, symbols, simplify, budget)
+        try:
+            return [_component_task((kind, index)) for index in indices]
+        finally:
+            _worker_state.clear()
+    workers = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_component_worker,
+                             initargs=(Gamma, symbols, simplify, budget)) as pool:
+        chunksize = max(1, len(indices) // (4 * workers))
+        return list(pool.map(_component_task, [(kind, index) for index in indices], chunksize=chunksize))
+
+def _reduce_components(exprs, processes=1, simplify=False, budget=None):
+    reduce = partial(_reduce_component, simplify=simplify, budget=budget)
+    if not simplify:
+        return list(exprs)
+    if processes == 1 or len(exprs) < 2:
+        return [reduce(expr) for expr in exprs]
+    workers = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(reduce, exprs, chunksize=max(1, len(exprs) // (4 * workers))))
 
 # Define the Ricci tensor computation correctly
-def ricci_tensor(Gamma, symbols):
-    R = sp.MutableDenseNDimArray.zeros(4, 4)
-    for i in range(4):
-        for j in range(4):
-            R[i, j] = sum([sp.diff(Gamma[k, i, j], symbols[k]) - sp.diff(Gamma[k, i, k], symbols[j]) +
-                           sum([Gamma[l, i, j] * Gamma[k, l, k] - Gamma[l, i, k] * Gamma[k, l, j] for l in range(4)]) for k in range(4)])
+def ricci_tensor(Gamma, symbols, processes=1, simplify=False, budget=None, sparse=False):
+    """
+    Compute the Ricci tensor R_ij directly from the Christoffel symbols.
+
+    Only the components with i <= j are derived; the rest are mirrored.
+
+    Parameters:
+    Gamma (sympy NDimArray or SparseTensor): The Christoffel symbols.
+    symbols (sequence of sympy Symbols): The coordinates.
+    processes (int or None): Worker processes; 1 runs serially, None uses every core.
+    simplify (bool or str): False, 'canonical' or True; see _compute_components().
+    budget (float): Seconds allowed per component when simplify is True.
+    sparse (bool): Return a SparseTensor instead of a dense array.
+
+    Returns:
+    sympy MutableDenseNDimArray or SparseTensor: The n x n Ricci tensor.
+    """
+    n = len(symbols)
+    R = SparseTensor((n, n), symmetric=[(0, 1)])
+    indices = [(i, j) for i in range(n) for j in range(i, n)]
+    for (i, j), expr in _compute_components('ricci', indices, Gamma, symbols, processes, simplify, budget):
+        R[i, j] = expr
+    return R if sparse else R.to_array()
+
+# Define the Riemann tensor R^rho_sigma_mu_nu
+def riemann_tensor(Gamma, symbols, processes=1, simplify=False, budget=None, sparse=False):
+    """
+    Compute the Riemann tensor R^rho_{sigma mu nu} from the Christoffel symbols.
+
+    The tensor is antisymmetric in its last two indices, so only mu < nu is
+    derived and the mirrored components are negated copies.
+
+    Parameters:
+    Gamma (sympy NDimArray or SparseTensor): The Christoffel symbols.
+    symbols (sequence of sympy Symbols): The coordinates.
+    processes (int or None): Worker processes; 1 runs serially, None uses every core.
+    simplify (bool or str): False, 'canonical' or True; see _compute_components().
+    budget (float): Seconds allowed per component when simplify is True.
+    sparse (bool): Return a SparseTensor instead of a dense array.
+
+    Returns:
+    sympy MutableDenseNDimArray or SparseTensor: The n x n x n x n Riemann tensor.
+    """
+    n = len(symbols)
+    Riemann = SparseTensor((n, n, n, n), antisymmetric=[(2, 3)])
+    indices = [(rho, sigma, mu, nu) for rho in range(n) for sigma in range(n)
+               for mu in range(n) for nu in range(mu + 1, n)]
+    for (rho, sigma, mu, nu), expr in _compute_components('riemann', indices, Gamma, symbols,
+                                                          processes, simplify, budget):
+        Riemann[rho, sigma, mu, nu] = expr
+    return Riemann if sparse else Riemann.to_array()
+
+# Contract the Riemann tensor over its first and third indices
+def ricci_from_riemann(Riemann):
+    n = Riemann.shape[0]
+    if isinstance(Riemann, SparseTensor):
+        R = SparseTensor((n, n), symmetric=[(0, 1)])
+        for (i, j), entries in Riemann.lookup((1, 3)).items():
+            if i <= j:
+                R[i, j] = sum(expr for (k, _, l, _), expr in entries if k == l)
+        return R
+    R = _zeros(n, n)
+    for i in range(n):
+        for j in range(i, n):
+            R[i, j] = R[j, i] = sum(Riemann[k, i, k, j] for k in range(n))
     return R
 
-R = ricci_tensor(Gamma, symbols)
-
-# Display the Ricci tensor components
-print("Ricci tensor components:")
-print("R_tt:", R[0, 0])             
-# R_tt: -1.0*G**2*M**2/(c**4*r**4) - 1.0*G**2*M**2*(-2*G*M + c**2*r)**2/(c**8*r**6*(-2*G*M/(c**2*r) + 1)**2) + 1.0*G*M/(c**2*r**3) - 1.0*G*M*(-2*G*M + c**2*r)/(c**4*r**4)
-print("R_rr:", R[1, 1])             
-# R_rr: -1.0*G**2*M**2/(r**2*(-2*G*M + c**2*r)**2) - 1.0*G**2*M**2/(c**4*r**4*(-2*G*M/(c**2*r) + 1)**2) + 1.0*G*M*c**2/(r*(-2*G*M + c**2*r)**2) + 1.0*G*M/(r**2*(-2*G*M + c**2*r)) - 2.0*G*M*(-2*G*M + c**2*r)/(c**4*r**4*(-2*G*M/(c**2*r) + 1)**2)
-print("R_thth:", R[2, 2])           
-# R_thth: -1.0*G*M/(c**2*r) + 1.0*G*M*(-2*G*M + c**2*r)**2/(c**6*r**3*(-2*G*M/(c**2*r) + 1)**2)
-print("R_phiphi:", R[3, 3])         
-# R_phiphi: -1.0*G*M*sin(theta)**2/(c**2*r) + 1.0*G*M*(-2*G*M + c**2*r)**2*sin(theta)**2/(c**6*r**3*(-2*G*M/(c**2*r) + 1)**2)
-print("\n")
-print("Display the full Ricci tensor matrix:")
-print(R)
-# [[-1.0*G**2*M**2/(c**4*r**4) - 1.0*G**2*M**2*(-2*G*M + c**2*r)**2/(c**8*r**6*(-2*G*M/(c**2*r) + 1)**2) + 1.0*G*M/(c**2*r**3) - 1.0*G*M*(-2*G*M + c**2*r)/(c**4*r**4), 0, 0, 0], [0, -1.0*G**2*M**2/(r**2*(-2*G*M + c**2*r)**2) - 1.0*G**2*M**2/(c**4*r**4*(-2*G*M/(c**2*r) + 1)**2) + 1.0*G*M*c**2/(r*(-2*G*M + c**2*r)**2) + 1.0*G*M/(r**2*(-2*G*M + c**2*r)) - 2.0*G*M*(-2*G*M + c**2*r)/(c**4*r**4*(-2*G*M/(c**2*r) + 1)**2), 0, 0], [0, 0, -1.0*G*M/(c**2*r) + 1.0*G*M*(-2*G*M + c**2*r)**2/(c**6*r**3*(-2*G*M/(c**2*r) + 1)**2), 0], [0, 0, 0, -1.0*G*M*sin(theta)**2/(c**2*r) + 1.0*G*M*(-2*G*M + c**2*r)**2*sin(theta)**2/(c**6*r**3*(-2*G*M/(c**2*r) + 1)**2)]] 
-sp.pprint(R)
-"""
-⎡                               2
-⎢   2  2    2  2 ⎛          2  ⎞                  ⎛          2  ⎞
-⎢  G ⋅M    G ⋅M ⋅⎝-2⋅G⋅M + c ⋅r⎠    1.0⋅G⋅M   G⋅M⋅⎝-2⋅G⋅M + c ⋅r⎠
-⎢- ───── - ────────────────────── + ─────── - ───────────────────
-⎢   4  4                       2      2  3            4  4
-⎢  c ⋅r      8  6 ⎛  2⋅G⋅M    ⎞      c ⋅r            c ⋅r
-⎢           c ⋅r ⋅⎜- ───── + 1⎟
-⎢                 ⎜    2      ⎟
-⎢                 ⎝   c ⋅r    ⎠
-⎢
-⎢                                                                            2
-⎢                                                                           G
-⎢                               0                                  - ─────────
-⎢
-⎢                                                                     2 ⎛
-⎢                                                                    r ⋅⎝-2⋅G⋅
-⎢
-⎢
-⎢
-⎢
-⎢
-⎢
-⎢                               0
-⎢
-⎢
-⎢
-⎢
-⎢
-⎢
-⎢
-⎢
-⎢
-⎢                               0
-⎢
-⎢
-⎢
-⎢
-⎣
-
-
-
-
-                                            0
-
-
-
-
-
-
-  2                  2  2                        2
-⋅M                  G ⋅M                1.0⋅G⋅M⋅c             1.0⋅G⋅M
-────────── - ──────────────────── + ────────────────── + ────────────────── -
-         2                      2                    2    2 ⎛          2  ⎞
-     2  ⎞     4  4 ⎛  2⋅G⋅M    ⎞      ⎛          2  ⎞    r ⋅⎝-2⋅G⋅M + c ⋅r⎠
-M + c ⋅r⎠    c ⋅r ⋅⎜- ───── + 1⎟    r⋅⎝-2⋅G⋅M + c ⋅r⎠
-                   ⎜    2      ⎟
-                   ⎝   c ⋅r    ⎠
-
-
-
-
-                                            0
-
-
-
-
-
-
-
-
-
-                                            0
-
-
-
-
-
-
-
-
-
-                                         0
-
-
-
-
-
-
-        ⎛          2  ⎞
-2.0⋅G⋅M⋅⎝-2⋅G⋅M + c ⋅r⎠
-───────────────────────                  0
-                     2
-   4  4 ⎛  2⋅G⋅M    ⎞
-  c ⋅r ⋅⎜- ───── + 1⎟
-        ⎜    2      ⎟
-        ⎝   c ⋅r    ⎠
-
-                                                         2
-                                          ⎛          2  ⎞
-                           G⋅M    1.0⋅G⋅M⋅⎝-2⋅G⋅M + c ⋅r⎠
-                         - ──── + ────────────────────────
-                            2                          2
-                           c ⋅r      6  3 ⎛  2⋅G⋅M    ⎞
-                                    c ⋅r ⋅⎜- ───── + 1⎟
-                                          ⎜    2      ⎟
-                                          ⎝   c ⋅r    ⎠
-
-
-                                                                     2
-                                                              G⋅M⋅sin (θ)   1.
-                                         0                  - ─────────── + ──
-                                                                   2
-                                                                  c ⋅r
-
-
-
-
-                              ⎤
-                              ⎥
-                              ⎥
-     0                        ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-     0                        ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-     0                        ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                              ⎥
-                     2        ⎥
-      ⎛          2  ⎞     2   ⎥
-0⋅G⋅M⋅⎝-2⋅G⋅M + c ⋅r⎠ ⋅sin (θ)⎥
-──────────────────────────────⎥
-                       2      ⎥
-     6  3 ⎛  2⋅G⋅M    ⎞       ⎥
-    c ⋅r ⋅⎜- ───── + 1⎟       ⎥
-          ⎜    2      ⎟       ⎥
-          ⎝   c ⋅r    ⎠       ⎦
-"""
+# Contract the Ricci tensor with the inverse metric
+def ricci_scalar(R, g_inv):
+    n = g_inv.shape[0]
+    return sp.sympify(sum(g_inv[i, j] * R[i, j] for i in range(n) for j in range(n) if g_inv[i, j] != 0))
+
+# Define the Einstein tensor G_mu_nu = R_mu_nu - R g_mu_nu / 2
+def einstein_tensor(R, R_scalar, g):
+    n = g.shape[0]
+    G_mn = _zeros(n, n)
+    for i in range(n):
+        for j in range(i, n):
+            G_mn[i, j] = G_mn[j, i] = R[i, j] - R_scalar * g[i, j] / 2
+    return G_mn
+
+# Full pipeline from a metric in any number of dimensions
+def curvature_tensors(g, symbols, processes=1, simplify=False, budget=10.0, exact=True):
+    """
+    Derive the connection and curvature of an n-dimensional metric.
+
+    Every stage is canonicalized before it feeds the next one, so expressions
+    stay small enough to differentiate. The Riemann components are derived,
+    and with simplify=True also simplified, in a process pool; the Ricci
+    tensor, Ricci scalar and Einstein tensor follow by contraction. Without
+    simplify=True, full simplification is deferred until a component of the
+    returned LazyTensors is indexed.
+
+    In exact mode (the default) Float entries of the metric are converted to
+    Rationals and every stage keeps Rational coefficients, so cancellations
+    such as vacuum Ricci components going to 0 happen symbolically; floats
+    only appear once the tensors are compiled with lambdify_tensor().
+
+    Parameters:
+    g (sympy Matrix): The n x n metric.
+    symbols (sequence of sympy Symbols): The coordinates.
+    processes (int or None): Worker processes; 1 runs serially, None uses every core.
+    simplify (bool): Simplify every independent component eagerly.
+    budget (float): Seconds allowed per component simplification; None for no limit.
+    exact (bool): Keep Rational coefficients throughout.
+
+    Returns:
+    dict: 'g_inv' (sympy Matrix), 'Gamma', 'Riemann', 'Ricci' and 'Einstein'
+    (LazyTensor) and 'scalar' (sympy expression).
+    """
+    n = g.shape[0]
+    mode = True if simplify else 'canonical'
+    if exact:
+        g = g.applyfunc(rationalize)
+    g_inv = g.inv().applyfunc(canonicalize)
+    Gamma = christoffel(g, g_inv, symbols, exact=exact, sparse=True).applyfunc(canonicalize)
+    Riemann = riemann_tensor(Gamma, symbols, processes, mode, budget, sparse=True)
+    Ricci = ricci_from_riemann(Riemann)
+    upper = [(i, j) for i in range(n) for j in range(i, n)]
+    for (i, j), expr in zip(upper, _reduce_components([Ricci[i, j] for i, j in upper], processes, mode, budget)):
+        Ricci[i, j] = Ricci[j, i] = expr
+    scalar = _reduce_component(ricci_scalar(Ricci, g_inv), mode, budget)
+    Einstein = einstein_tensor(Ricci, scalar, g)
+    for (i, j), expr in zip(upper, _reduce_components([Einstein[i, j] for i, j in upper], processes, mode, budget)):
+        Einstein[i, j] = Einstein[j, i] = expr
+    return {'g_inv': g_inv,
+            'Gamma': LazyTensor(Gamma, budget, simplified=bool(simplify)),
+            'Riemann': LazyTensor(Riemann, budget, simplified=bool(simplify)),
+            'Ricci': LazyTensor(Ricci, budget, simplified=bool(simplify)),
+            'scalar': scalar,
+            'Einstein': LazyTensor(Einstein, budget, simplified=bool(simplify))}
+
+# Compile symbolic tensors into vectorized NumPy kernels
+def lambdify_tensor(tensor, args):
+    """
+    Compile a symbolic tensor into a vectorized NumPy callable.
+
+    Only the non-zero components are compiled, and they are lambdified
+    together with common subexpression elimination so that shared factors
+    such as (-2*G*M + c**2*r) are evaluated once per call.
+
+    Parameters:
+    tensor (sympy NDimArray or Matrix): The symbolic tensor.
+    args (sequence of sympy Symbols): The symbols the callable takes, in order.
+
+    Returns:
+    callable: f(*values) taking broadcastable arrays for args and returning a
+    dense float array of shape (N,) + tensor.shape, where N is the number of
+    broadcast sample points.
+    """
+    shape = tuple(tensor.shape)
+    components = sp.flatten(tensor.tolist())
+    positions = [n for n, component in enumerate(components) if component != 0]
+    kernel = sp.lambdify(args, [components[n] for n in positions], modules='numpy', cse=True)
+
+    def evaluate(*values):
+        values = [np.ravel(v) for v in np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in values])]
+        n_points = values[0].size
+        out = np.zeros((n_points, len(components)))
+        if positions:
+            for n, column in zip(positions, kernel(*values)):
+                out[:, n] = column
+        return out.reshape((n_points,) + shape)
+
+    return evaluate
+
+
+# A metric and its lazily derived tensors
+class Metric:
+    """
+    A metric whose inverse, connection and curvature are derived on demand.
+
+    Each tensor is computed the first time it is accessed and then kept. The
+    inverse metric, Christoffel symbols, Ricci tensor and Ricci scalar are
+    also stored in (and first looked up from) the on-disk cache, when one is
+    given.
+
+    Parameters:
+    g (sympy Matrix): The n x n metric.
+    symbols (sequence of sympy Symbols): The coordinates.
+    exact (bool): Derive the Christoffel symbols in exact-rational mode.
+    cache (CurvatureCache): Where to persist derived tensors; None disables it.
+    """
+
+    _cached_names = ('g_inv', 'Gamma', 'Ricci', 'scalar')
+
+    def __init__(self, g, symbols, exact=False, cache=None):
+        self.g = sp.Matrix(g)
+        self.symbols = tuple(symbols)
+        self.exact = exact
+        self.cache = cache
+        self._values = {}
+        self._numeric = {}
+        self._cache_key = None
+
+    def _lookup(self, name, compute):
+        if name in self._values:
+            return self._values[name]
+        if self.cache is not None and self._cache_key is None:
+            self._cache_key = self.cache.key(self.g, self.symbols, 'exact' if self.exact else '')
+            self._values.update(self.cache.get(self._cache_key) or {})
+            if name in self._values:
+                return self._values[name]
+        value = self._values[name] = compute()
+        if self.cache is not None and name in self._cached_names:
+            self.cache.put(self._cache_key, {key: self._values[key] for key in self._cached_names
+                                             if key in self._values})
+        return value
+
+    @property
+    def g_inv(self):
+        return self._lookup('g_inv', self.g.inv)
+
+    @property
+    def christoffel(self):
+        return self._lookup('Gamma', lambda: christoffel(self.g, self.g_inv, self.symbols, exact=self.exact))
+
+    @property
+    def ricci(self):
+        return self._lookup('Ricci', lambda: ricci_tensor(self.christoffel, self.symbols))
+
+    @property
+    def ricci_scalar(self):
+        return self._lookup('scalar', lambda: ricci_scalar(self.ricci, self.g_inv))
+
+    @property
+    def riemann(self):
+        return self._lookup('Riemann', lambda: riemann_tensor(self.christoffel, self.symbols))
+
+    @property
+    def einstein(self):
+        return self._lookup('Einstein', lambda: einstein_tensor(self.ricci, self.ricci_scalar, self.g))
+
+    def curvature(self, **kwargs):
+        """
+        Run the full canonicalizing pipeline; see curvature_tensors().
+        """
+        return curvature_tensors(self.g, self.symbols, **kwargs)
+
+    def numeric(self, name, args):
+        """
+        Compile one of the derived tensors into a NumPy kernel, once per argument list.
+
+        Parameters:
+        name (str): 'g_inv', 'christoffel', 'ricci', 'riemann' or 'einstein'.
+        args (sequence of sympy Symbols): The symbols the kernel takes, in order.
+
+        Returns:
+        callable: The kernel from lambdify_tensor().
+        """
+        key = (name, tuple(args))
+        if key not in self._numeric:
+            self._numeric[key] = lambdify_tensor(getattr(self, name), args)
+        return self._numeric[key]
+
+# Define the Schwarzschild metric
+@lru_cache(maxsize=None)
+def schwarzschild_metric():
+    g_tt = -(1 - 2*G*M/(c**2*r))
+    g_rr = (1 - 2*G*M/(c**2*r))**(-1)
+    g_thth = r**2
+    g_phiphi = r**2 * sp.sin(theta)**2
+    g = sp.Matrix([
+        [g_tt, 0, 0, 0],
+        [0, g_rr, 0, 0],
+        [0, 0, g_thth, 0],
+        [0, 0, 0, g_phiphi]
+    ])
+    return Metric(g, symbols, cache=CurvatureCache())
+
+# Module-level names from when this file ran the Schwarzschild derivation at
+# import time; they are now derived on first access.
+_SCHWARZSCHILD_ATTRIBUTES = {
+    'g': lambda m: m.g,
+    'g_inv': lambda m: m.g_inv,
+    'Gamma': lambda m: m.christoffel,
+    'R': lambda m: m.ricci,
+    'R_scalar': lambda m: m.ricci_scalar,
+    'Gamma_numeric': lambda m: m.numeric('christoffel', (r, theta, M, G, c)),
+    'R_numeric': lambda m: m.numeric('ricci', (r, theta, M, G, c)),
+}
+
+def __getattr__(name):
+    if name in _SCHWARZSCHILD_ATTRIBUTES:
+        return _SCHWARZSCHILD_ATTRIBUTES[name](schwarzschild_metric())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == "__main__":
+    import runpy
+    runpy.run_module('SchwarzschildDemo', run_name='__main__')
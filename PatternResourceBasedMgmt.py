@@ -86,26 +86,59 @@ Here's a breakdown of the code:
 9. **Vortex Creation**: The `create_vortex` function sums multiple patterns, potentially representing complex interactions.
 
 10. **System Simulation**: The `simulate_system` function sums the vortices to model a more complex system.
+"""
 
+import itertools
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
-
-```python
 import numpy as np
-import matplotlib.pyplot as plt
+
+try:
+    import scipy.sparse as sparse
+except ImportError:  # scipy is only needed for sparse inputs
+    sparse = None
+
+def _issparse(matrix):
+    return sparse is not None and sparse.issparse(matrix)
+
+def _canonical(matrix):
+    # CSR/CSC (other formats become CSR) with duplicate entries summed, so .data holds each value once;
+    # a matrix already in that form is returned as is
+    if matrix.format in ('csr', 'csc') and matrix.has_canonical_format:
+        return matrix
+    matrix = matrix.copy() if matrix.format in ('csr', 'csc') else matrix.tocsr()
+    matrix.sum_duplicates()
+    return matrix
+
+def _sparse_product(matrix1, matrix2):
+    # Element-wise product that stays sparse (and O(nnz)) when either operand is sparse
+    if _issparse(matrix1):
+        return matrix1.multiply(matrix2)
+    if _issparse(matrix2):
+        return matrix2.multiply(matrix1)
+    return matrix1 * matrix2
 
 def calculate_total_utility(utility_matrix, allocation_matrix, weight_vector):
     """
     Calculate the total utility by summing up the product of the utility matrix, 
     the allocation matrix, and the weight vector.
 
+    Either matrix may be a scipy.sparse matrix, in which case only its
+    non-zeros are multiplied.
+
     Parameters:
-    utility_matrix (numpy array): The utility matrix.
-    allocation_matrix (numpy array): The allocation matrix.
+    utility_matrix (numpy array or sparse matrix): The utility matrix.
+    allocation_matrix (numpy array or sparse matrix): The allocation matrix.
     weight_vector (numpy array): The weight vector.
 
     Returns:
     float: The total utility.
     """
+    if _issparse(utility_matrix) or _issparse(allocation_matrix):
+        return _sparse_product(_sparse_product(utility_matrix, allocation_matrix), weight_vector).sum()
     return np.sum(utility_matrix * allocation_matrix * weight_vector)
 
 def ensure_pattern_resource_relationship(pattern_matrix, resource_matrix, importance_weights, total_resources):
@@ -113,350 +146,658 @@ def ensure_pattern_resource_relationship(pattern_matrix, resource_matrix, import
     Ensure that the allocated resources respect the importance weight of each pattern.
 
     Parameters:
-    pattern_matrix (numpy array): The pattern matrix.
-    resource_matrix (numpy array): The resource matrix.
+    pattern_matrix (numpy array or sparse matrix): The pattern matrix.
+    resource_matrix (numpy array or sparse matrix): The resource matrix.
     importance_weights (numpy array): The importance weights.
     total_resources (float): The total resources.
 
     Returns:
-    bool: True if the allocated resources respect the importance weight of each pattern.
+    numpy array of bool: For each pattern, True if its allocated resources
+    respect its importance weight.
     """
-    return np.sum(pattern_matrix * resource_matrix) <= importance_weights * total_resources
+    if _issparse(pattern_matrix) or _issparse(resource_matrix):
+        used = np.asarray(_sparse_product(pattern_matrix, resource_matrix).sum(axis=1)).ravel()
+        return used <= importance_weights * total_resources
+    return np.sum(pattern_matrix * resource_matrix, axis=1) <= importance_weights * total_resources
 
 def ensure_resource_allocation(resource_matrix, total_resources):
     """
     Ensure that the total resource allocation does not exceed the individual importance weights.
 
     Parameters:
-    resource_matrix (numpy array): The resource matrix.
+    resource_matrix (numpy array or sparse matrix): The resource matrix.
     total_resources (float): The total resources.
 
     Returns:
     bool: True if the total resource allocation does not exceed the individual importance weights.
     """
-    return np.sum(resource_matrix) <= total_resources
+    return resource_matrix.sum() <= total_resources if _issparse(resource_matrix) else \
+        np.sum(resource_matrix) <= total_resources
 
 def ensure_non_negativity(resource_matrix):
     """
     Ensure that the resource allocations are non-negative.
 
     Parameters:
-    resource_matrix (numpy array): The resource matrix.
+    resource_matrix (numpy array or sparse matrix): The resource matrix.
 
     Returns:
     bool: True if the resource allocations are non-negative.
     """
+    if _issparse(resource_matrix):
+        # Implicit zeros are non-negative; only the stored values need checking
+        return bool(_canonical(resource_matrix).data.min(initial=0) >= 0)
     return np.all(resource_matrix >= 0)
 
-def generate_pattern(pattern_matrix1, pattern_matrix2):
-    """
-    Generate a new pattern matrix by calculating the dot product of two pattern matrices.
-
-    Parameters:
-    pattern_matrix1 (numpy array): The first pattern matrix.
-    pattern_matrix2 (numpy array): The second pattern matrix.
+# Per-scenario results of evaluate_allocations(); the *_violated fields are True where a check fails
+ScenarioEvaluation = namedtuple('ScenarioEvaluation', ['utility', 'pattern_resource_violated',
+                                                       'resource_allocation_violated', 'non_negativity_violated',
+                                                       'feasible'])
 
-    Returns:
-    numpy array: The new pattern matrix.
+def evaluate_allocations(utility_matrix, allocations, weight_vector, pattern_matrix, importance_weights,
+                         total_resources, chunk_bytes=1 << 20):
     """
-    return np.dot(pattern_matrix1, pattern_matrix2)
+    Score a stack of candidate allocations and run every ensure_* check on each.
 
-def visualize_pattern(pattern_matrix):
-    """
-    Visualize the pattern matrix as a heatmap.
+    Scenario s gets calculate_total_utility(utility_matrix, allocations[s],
+    weight_vector) and the negations of the three ensure_* checks. The
+    weighted utility matrix is formed once; scenarios are then contracted
+    against it in chunks of about chunk_bytes (so each chunk stays in
+    cache), and no (S, P, R) temporary is ever built, so allocations may
+    also be a memory-mapped array larger than RAM.
 
     Parameters:
-    pattern_matrix (numpy array): The pattern matrix.
-    """
-    plt.imshow(pattern_matrix, cmap='hot', interpolation='nearest')
-    plt.show()
-
-def analyze_relationship(pattern_matrix1, pattern_matrix2):
-    """
-    Analyze the relationship between two pattern matrices by calculating the absolute difference.
-
-    Parameters:
-    pattern_matrix1 (numpy array): The first pattern matrix.
-    pattern_matrix2 (numpy array): The second pattern matrix.
+    utility_matrix (numpy array): The (P, R) utility matrix.
+    allocations (numpy array): The (S, P, R) stack of allocation matrices.
+    weight_vector (numpy array or float): The weight vector, broadcast
+        against the utility matrix as in calculate_total_utility().
+    pattern_matrix (numpy array): The (P, R) pattern matrix.
+    importance_weights (numpy array): The (P,) importance weights.
+    total_resources (float): The total resources.
+    chunk_bytes (int): Approximate size of the allocation block processed at once.
 
     Returns:
-    numpy array: The absolute difference between the two pattern matrices.
+    ScenarioEvaluation: The (S,) utilities, the (S, P) mask of patterns
+    exceeding their importance share, the (S,) masks of scenarios exceeding
+    the total resources or holding a negative allocation, and the (S,) mask
+    of scenarios passing every check.
+    """
+    allocations = np.asanyarray(allocations)
+    if allocations.ndim != 3:
+        raise ValueError(f"Expected an (S, P, R) stack of allocations, got shape {allocations.shape}")
+    n_scenarios, n_patterns, n_resources = allocations.shape
+    weighted = np.broadcast_to(utility_matrix * weight_vector, (n_patterns, n_resources)).ravel()
+    pattern_matrix = np.broadcast_to(pattern_matrix, (n_patterns, n_resources))
+    pattern_limits = np.broadcast_to(importance_weights * total_resources, (n_patterns,))
+
+    utility = np.empty(n_scenarios)
+    pattern_violated = np.empty((n_scenarios, n_patterns), dtype=bool)
+    total_violated = np.empty(n_scenarios, dtype=bool)
+    negative = np.empty(n_scenarios, dtype=bool)
+    step = max(1, chunk_bytes // max(1, n_patterns * n_resources * allocations.itemsize))
+    for start in range(0, n_scenarios, step):
+        block = allocations[start:start + step]
+        flat = block.reshape(len(block), -1)
+        utility[start:start + step] = flat @ weighted
+        pattern_violated[start:start + step] = np.einsum('spr,pr->sp', block, pattern_matrix) > pattern_limits
+        total_violated[start:start + step] = flat.sum(axis=1) > total_resources
+        negative[start:start + step] = flat.min(axis=1, initial=0) < 0
+
+    feasible = ~(pattern_violated.any(axis=1) | total_violated | negative)
+    return ScenarioEvaluation(utility, pattern_violated, total_violated, negative, feasible)
+
+def _open_pattern(pattern_matrix):
+    # Paths to .npy files are memory-mapped read-only instead of loaded
+    if isinstance(pattern_matrix, (str, os.PathLike)):
+        return np.load(pattern_matrix, mmap_mode='r')
+    return pattern_matrix
+
+def generate_pattern(pattern_matrix1, pattern_matrix2, out=None, tile_size=None, workers=None):
     """
-    return np.abs(pattern_matrix1 - pattern_matrix2)
+    Generate a new pattern matrix by calculating the dot product of two pattern matrices.
 
-def create_difference_matrix(pattern_matrix1, pattern_matrix2):
-    """
-    Create a difference matrix by calculating the absolute difference between two pattern matrices.
+    With in-memory arrays and no out or tile_size this is a plain np.dot.
+    Otherwise the product is computed out of core, one output tile at a
+    time: each tile accumulates its row panel of the first matrix times its
+    column panel of the second, tile_size at a time along the shared
+    dimension, and is written straight to out. Only a few tiles per worker
+    are ever in memory, so with .npy paths for the inputs and the output the
+    matrices may be far larger than RAM.
 
-    Parameters:
-    pattern_matrix1 (numpy array): The first pattern matrix.
-    pattern_matrix2 (numpy array): The second pattern matrix.
-
-    Returns:
-    numpy array: The difference matrix.
-    """
-    return np.abs(pattern_matrix1 - pattern_matrix2)
-
-def increment_values(pattern_matrix):
-    """
-    Increment the values in the pattern matrix by 1.
+    If either matrix is a scipy.sparse matrix the product is a sparse
+    matrix product: sparse times sparse stays sparse, sparse times dense is
+    dense. With out given, a sparse product is written into it tile_size
+    rows at a time.
 
     Parameters:
-    pattern_matrix (numpy array): The pattern matrix.
+    pattern_matrix1 (numpy array, sparse matrix or path): The first pattern
+        matrix, or a .npy file to memory-map.
+    pattern_matrix2 (numpy array, sparse matrix or path): The second pattern
+        matrix, or a .npy file to memory-map.
+    out (numpy array or path): Where to write the product: an array (e.g. a
+        memmap) of the right shape, or a .npy path to create as a memmap.
+    tile_size (int): Edge length of the square tiles; defaults to 2048 in
+        out-of-core mode.
+    workers (int): Threads computing tiles; defaults to the number of CPUs.
 
     Returns:
-    numpy array: The pattern matrix with incremented values.
-    """
-    return pattern_matrix + 1
-
-def create_vortex(pattern_matrices):
-    """
-    Create a vortex by summing multiple pattern matrices.
+    numpy array: The new pattern matrix (the memmap when out is a path).
+    """
+    pattern_matrix1 = _open_pattern(pattern_matrix1)
+    pattern_matrix2 = _open_pattern(pattern_matrix2)
+    if _issparse(pattern_matrix1) or _issparse(pattern_matrix2):
+        product = pattern_matrix1 @ pattern_matrix2
+        if out is None:
+            return product
+        if isinstance(out, (str, os.PathLike)):
+            out = np.lib.format.open_memmap(out, mode='w+', dtype=product.dtype, shape=product.shape)
+        elif out.shape != product.shape:
+            raise ValueError(f"Output of shape {out.shape} cannot hold a {product.shape} product")
+        if _issparse(product):
+            product = product.tocsr()
+            step = tile_size or 2048
+            for i in range(0, product.shape[0], step):
+                out[i:i + step] = product[i:i + step].toarray()
+        else:
+            out[...] = product
+        if isinstance(out, np.memmap):
+            out.flush()
+        return out
+    if out is None and tile_size is None and not isinstance(pattern_matrix1, np.memmap) \
+            and not isinstance(pattern_matrix2, np.memmap):
+        return np.dot(pattern_matrix1, pattern_matrix2)
+
+    (rows, inner), (inner2, columns) = pattern_matrix1.shape, pattern_matrix2.shape
+    if inner != inner2:
+        raise ValueError(f"Cannot multiply shapes {pattern_matrix1.shape} and {pattern_matrix2.shape}")
+    dtype = np.result_type(pattern_matrix1.dtype, pattern_matrix2.dtype)
+    if out is None:
+        out = np.empty((rows, columns), dtype=dtype)
+    elif isinstance(out, (str, os.PathLike)):
+        out = np.lib.format.open_memmap(out, mode='w+', dtype=dtype, shape=(rows, columns))
+    elif out.shape != (rows, columns):
+        raise ValueError(f"Output of shape {out.shape} cannot hold a {(rows, columns)} product")
+    tile = tile_size or 2048
+
+    def compute_tile(origin):
+        i, j = origin
+        block = np.zeros((min(tile, rows - i), min(tile, columns - j)), dtype=dtype)
+        for k in range(0, inner, tile):
+            block += np.dot(pattern_matrix1[i:i + tile, k:k + tile], pattern_matrix2[k:k + tile, j:j + tile])
+        out[i:i + tile, j:j + tile] = block
+
+    # Row-major tile order keeps each row panel of the first matrix hot in the page cache
+    origins = [(i, j) for i in range(0, rows, tile) for j in range(0, columns, tile)]
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        list(pool.map(compute_tile, origins))
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+def downsample_pattern(pattern_matrix, max_shape=(1024, 1024), pooling='max', band_bytes=1 << 24):
+    """
+    Shrink a pattern matrix for display by pooling blocks of elements.
+
+    Each axis is reduced by the smallest integer factor that brings it within
+    max_shape; the last block along an axis may be partial. The input is read
+    in bands of rows, so a memory-mapped matrix is never loaded whole. A
+    scipy.sparse matrix is pooled straight from its non-zeros.
 
     Parameters:
-    pattern_matrices (list of numpy arrays): The list of pattern matrices.
+    pattern_matrix (numpy array or sparse matrix): The 2-D pattern matrix.
+    max_shape (tuple of int): The largest (rows, columns) to return.
+    pooling (str): 'max' keeps each block's peak, 'mean' its average.
+    band_bytes (int): Approximate size of the row bands read at once.
 
     Returns:
-    numpy array: The vortex.
-    """
-    return np.sum(pattern_matrices)
-
-def simulate_system(vortices):
-    """
-    Simulate the system by summing multiple vortices.
+    numpy array: The pooled matrix (the input itself if it already fits).
+    """
+    if pooling not in ('max', 'mean'):
+        raise ValueError(f"Unknown pooling {pooling!r}; expected 'max' or 'mean'")
+    if not _issparse(pattern_matrix):
+        pattern_matrix = np.asanyarray(pattern_matrix)
+    rows, columns = pattern_matrix.shape
+    factor_rows = -(-rows // max_shape[0])
+    factor_columns = -(-columns // max_shape[1])
+    if factor_rows == 1 and factor_columns == 1:
+        return pattern_matrix.toarray() if _issparse(pattern_matrix) else pattern_matrix
+    out_rows, out_columns = -(-rows // factor_rows), -(-columns // factor_columns)
+    if _issparse(pattern_matrix):
+        return _downsample_sparse(pattern_matrix, factor_rows, factor_columns, out_rows, out_columns, pooling)
+    pad_columns = out_columns * factor_columns - columns
+    out = np.empty((out_rows, out_columns), dtype=float if pooling == 'mean' else pattern_matrix.dtype)
+
+    # Elements per block, for the partial blocks on the bottom and right edges
+    if pooling == 'mean':
+        row_counts = np.full(out_rows, factor_rows)
+        row_counts[-1] = rows - (out_rows - 1) * factor_rows
+        column_counts = np.full(out_columns, factor_columns)
+        column_counts[-1] = columns - (out_columns - 1) * factor_columns
+
+    band = max(1, band_bytes // max(1, columns * pattern_matrix.itemsize * factor_rows))
+    for first in range(0, out_rows, band):
+        last = min(first + band, out_rows)
+        block = np.asarray(pattern_matrix[first * factor_rows:last * factor_rows])
+        pad_rows = (last - first) * factor_rows - len(block)
+        if pad_rows or pad_columns:
+            # Edge padding repeats real values, so it cannot change a maximum; means subtract it below
+            mode = 'edge' if pooling == 'max' else 'constant'
+            block = np.pad(block, ((0, pad_rows), (0, pad_columns)), mode=mode)
+        block = block.reshape(last - first, factor_rows, out_columns, factor_columns)
+        if pooling == 'max':
+            out[first:last] = block.max(axis=(1, 3))
+        else:
+            out[first:last] = block.sum(axis=(1, 3)) / np.outer(row_counts[first:last], column_counts)
+    return out
+
+def _downsample_sparse(pattern_matrix, factor_rows, factor_columns, out_rows, out_columns, pooling):
+    entries = _canonical(pattern_matrix).tocoo()
+    blocks = (entries.row // factor_rows) * out_columns + entries.col // factor_columns
+    rows, columns = pattern_matrix.shape
+    row_counts = np.minimum(factor_rows, rows - np.arange(out_rows) * factor_rows)
+    column_counts = np.minimum(factor_columns, columns - np.arange(out_columns) * factor_columns)
+    sizes = np.outer(row_counts, column_counts).ravel()
+    if pooling == 'mean':
+        totals = np.bincount(blocks, weights=entries.data, minlength=out_rows * out_columns)
+        return (totals / sizes).reshape(out_rows, out_columns)
+    # Starting at or below every stored value and zero leaves empty blocks at zero below
+    out = np.full(out_rows * out_columns, entries.data.min(initial=0), dtype=entries.dtype)
+    np.maximum.at(out, blocks, entries.data)
+    # A block with fewer stored entries than elements also holds implicit zeros
+    partial = np.bincount(blocks, minlength=out.size) < sizes
+    out[partial] = np.maximum(out[partial], 0)
+    return out.reshape(out_rows, out_columns)
+
+class PatternRenderer:
+    """
+    Headless heatmap renderer that writes pattern matrices to PNG files.
+
+    One Agg figure and one image artist are created up front and reused for
+    every call, and matrices larger than max_shape are pooled down first, so
+    rendering thousands of snapshots costs a fixed amount of memory and never
+    touches pyplot or a GUI backend. submit() renders on a background thread,
+    with at most max_pending pooled snapshots waiting at a time.
 
     Parameters:
-    vortices (list of numpy arrays): The list of vortices.
-
-    Returns:
-    numpy array: The simulated system.
+    max_shape (tuple of int): Largest matrix drawn as is; bigger ones are pooled.
+    pooling (str): 'max' or 'mean'; see downsample_pattern().
+    figsize (tuple of float): Figure size in inches.
+    dpi (int): Resolution of the PNG files.
+    cmap (str): The colormap.
+    axes (bool): Draw the axes and ticks; turning them off halves the time per frame.
+    compress_level (int): zlib level of the PNG files, 0-9; low levels encode fastest.
+    max_pending (int): Snapshots submit() may queue before it blocks.
+    """
+
+    def __init__(self, max_shape=(1024, 1024), pooling='max', figsize=(6.4, 4.8), dpi=100, cmap='hot',
+                 axes=True, compress_level=1, max_pending=8):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.max_shape = max_shape
+        self.pooling = pooling
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.image = self.axes.imshow(np.zeros((1, 1)), cmap=cmap, interpolation='nearest')
+        if not axes:
+            self.axes.set_axis_off()
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+
+    def _draw(self, pooled, shape, path):
+        with self._lock:
+            self.image.set_data(pooled)
+            # Keep the axes in the original matrix's coordinates
+            self.image.set_extent((-0.5, shape[1] - 0.5, shape[0] - 0.5, -0.5))
+            self.axes.set_xlim(-0.5, shape[1] - 0.5)
+            self.axes.set_ylim(shape[0] - 0.5, -0.5)
+            low, high = np.nanmin(pooled), np.nanmax(pooled)
+            self.image.set_clim(low, high if high > low else low + 1)
+            self.figure.savefig(path, format='png', pil_kwargs={'compress_level': self.compress_level})
+        return path
+
+    def render(self, pattern_matrix, path):
+        """
+        Draw a pattern matrix and write it to path as a PNG.
+
+        Returns:
+        str: The path written.
+        """
+        if not _issparse(pattern_matrix):
+            pattern_matrix = np.asanyarray(pattern_matrix)
+        return self._draw(downsample_pattern(pattern_matrix, self.max_shape, self.pooling),
+                          pattern_matrix.shape, path)
+
+    def submit(self, pattern_matrix, path):
+        """
+        Render a pattern matrix on the background thread.
+
+        The matrix is pooled on the calling thread, so only the small pooled
+        copy is queued; blocks while max_pending snapshots are waiting.
+
+        Returns:
+        concurrent.futures.Future: Resolves to the path once it is written.
+        """
+        if not _issparse(pattern_matrix):
+            pattern_matrix = np.asanyarray(pattern_matrix)
+        pooled = np.array(downsample_pattern(pattern_matrix, self.max_shape, self.pooling))
+        self._pending.acquire()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            future = self._executor.submit(self._draw, pooled, pattern_matrix.shape, path)
+        except BaseException:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda _: self._pending.release())
+        return future
+
+    def close(self):
+        """
+        Wait for submitted snapshots to be written.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+_default_renderer = None
+_default_renderer_lock = threading.Lock()
+
+def visualize_pattern(pattern_matrix, path=None):
     """
-    return np.sum(vortices)
-
-# Generate random pattern matrices
-pattern_matrix1 = np.random.rand(10, 10)
-pattern_matrix2 = np.random.rand(10, 10)
-
-# Generate a new pattern matrix
-new_pattern_matrix = generate_pattern(pattern_matrix1, pattern_matrix2)
-
-# Visualize the new pattern matrix
-visualize_pattern(new_pattern_matrix)
-
-# Analyze the relationship between the two pattern matrices
-relationship = analyze_relationship(pattern_matrix1, pattern_matrix2)
-
-# Create a difference matrix
-difference_matrix = create_difference_matrix(pattern_matrix1, pattern_matrix2)
-
-# Increment the values in the pattern matrix
-incremented_pattern_matrix = increment_values(pattern_matrix1)
-
-# Create a vortex
-vortex = create_vortex([pattern_matrix1, pattern_matrix2])
-
-# Simulate the system
-simulated_system = simulate_system([vortex, vortex])
-
-# Print the results
-print("New Pattern Matrix:")
-print(new_pattern_matrix)
-print("Relationship:")
-print(relationship)
-print("Difference Matrix:")
-print(difference_matrix)
-print("Incremented Pattern Matrix:")
-print(incremented_pattern_matrix)
-print("Vortex:")
-print(vortex)
-print("Simulated System:")
-print(simulated_system)
-```
-"""
-Here is the refactored code with improved variable names, comments, and docstrings:
-
-```python
-import numpy as np
-import matplotlib.pyplot as plt
+    Visualize the pattern matrix as a heatmap.
 
-def calculate_total_utility(utility_matrix, allocation_matrix, weight_vector):
-    """
-    Calculate the total utility by summing up the product of the utility matrix, 
-    the allocation matrix, and the weight vector.
+    With a path the heatmap is written there as a PNG by a shared headless
+    PatternRenderer, without blocking or opening a window; otherwise it is
+    shown interactively with pyplot, which is only imported then.
 
     Parameters:
-    utility_matrix (numpy array): The utility matrix.
-    allocation_matrix (numpy array): The allocation matrix.
-    weight_vector (numpy array): The weight vector.
+    pattern_matrix (numpy array or sparse matrix): The pattern matrix.
+    path (str): Optional PNG file to write instead of showing a window.
 
     Returns:
-    float: The total utility.
-    """
-    return np.sum(utility_matrix * allocation_matrix * weight_vector)
+    str or None: The path written, if any.
+    """
+    global _default_renderer
+    if path is not None:
+        with _default_renderer_lock:
+            if _default_renderer is None:
+                _default_renderer = PatternRenderer()
+        return _default_renderer.render(pattern_matrix, path)
+
+    import matplotlib.pyplot as plt
+    if _issparse(pattern_matrix):
+        pattern_matrix = downsample_pattern(pattern_matrix)
+    plt.imshow(pattern_matrix, cmap='hot', interpolation='nearest')
+    plt.show()
 
-def ensure_pattern_resource_relationship(pattern_matrix, resource_matrix, importance_weights, total_resources):
+def analyze_relationship(pattern_matrix1, pattern_matrix2):
     """
-    Ensure that the allocated resources respect the importance weight of each pattern.
+    Analyze the relationship between two pattern matrices by calculating the absolute difference.
 
     Parameters:
-    pattern_matrix (numpy array): The pattern matrix.
-    resource_matrix (numpy array): The resource matrix.
-    importance_weights (numpy array): The importance weights.
-    total_resources (float): The total resources.
+    pattern_matrix1 (numpy array or sparse matrix): The first pattern matrix.
+    pattern_matrix2 (numpy array or sparse matrix): The second pattern matrix.
 
     Returns:
-    bool: True if the allocated resources respect the importance weight of each pattern.
-    """
-    return np.sum(pattern_matrix * resource_matrix) <= importance_weights * total_resources
+    numpy array or sparse matrix: The absolute difference between the two
+    pattern matrices; sparse when both are sparse.
+    """
+    if _issparse(pattern_matrix1) and _issparse(pattern_matrix2):
+        return abs(pattern_matrix1 - pattern_matrix2)
+    if _issparse(pattern_matrix1) or _issparse(pattern_matrix2):
+        # Sparse minus dense is an np.matrix; keep returning plain arrays
+        return np.abs(np.asarray(pattern_matrix1 - pattern_matrix2))
+    return np.abs(pattern_matrix1 - pattern_matrix2)
 
-def ensure_resource_allocation(resource_matrix, total_resources):
+def create_difference_matrix(pattern_matrix1, pattern_matrix2):
     """
-    Ensure that the total resource allocation does not exceed the individual importance weights.
+    Create a difference matrix by calculating the absolute difference between two pattern matrices.
+
+    This is the same matrix as analyze_relationship(); summed, it is the L1
+    distance that PatternLibrary ranks patterns by.
 
     Parameters:
-    resource_matrix (numpy array): The resource matrix.
-    total_resources (float): The total resources.
+    pattern_matrix1 (numpy array or sparse matrix): The first pattern matrix.
+    pattern_matrix2 (numpy array or sparse matrix): The second pattern matrix.
 
     Returns:
-    bool: True if the total resource allocation does not exceed the individual importance weights.
+    numpy array or sparse matrix: The difference matrix; sparse when both are sparse.
     """
-    return np.sum(resource_matrix) <= total_resources
+    return analyze_relationship(pattern_matrix1, pattern_matrix2)
 
-def ensure_non_negativity(resource_matrix):
+def increment_values(pattern_matrix, stored_only=False, densify=False):
     """
-    Ensure that the resource allocations are non-negative.
+    Increment the values in the pattern matrix by 1.
+
+    A scipy.sparse matrix is never densified implicitly: incrementing its
+    implicit zeros as well would allocate the full matrix. Pass
+    stored_only=True to increment just its stored entries (the result stays
+    sparse with the same structure), or densify=True to get the dense array
+    with every element incremented; with neither a ValueError is raised.
 
     Parameters:
-    resource_matrix (numpy array): The resource matrix.
+    pattern_matrix (numpy array or sparse matrix): The pattern matrix.
+    stored_only (bool): Increment only the stored entries of a sparse matrix.
+    densify (bool): Convert a sparse matrix to a dense array and increment every element.
 
     Returns:
-    bool: True if the resource allocations are non-negative.
-    """
-    return np.all(resource_matrix >= 0)
+    numpy array or sparse matrix: The pattern matrix with incremented values;
+    sparse only for a sparse input with stored_only.
+    """
+    if _issparse(pattern_matrix):
+        if stored_only == densify:
+            raise ValueError("Incrementing a sparse matrix needs exactly one of stored_only=True "
+                             "(keep it sparse) or densify=True (every element)")
+        if densify:
+            return pattern_matrix.toarray() + 1
+        incremented = _canonical(pattern_matrix)
+        if incremented is pattern_matrix:
+            incremented = pattern_matrix.copy()
+        incremented.data = incremented.data + 1
+        return incremented
+    return pattern_matrix + 1
 
-def generate_pattern(pattern_matrix1, pattern_matrix2):
+def accumulate_patterns(pattern_matrices, weights=None, out=None, workers=1, chunk_size=None,
+                        block_bytes=1 << 20):
     """
-    Generate a new pattern matrix by calculating the dot product of two pattern matrices.
+    Sum pattern matrices element-wise into one output buffer, streaming the input.
 
-    Parameters:
-    pattern_matrix1 (numpy array): The first pattern matrix.
-    pattern_matrix2 (numpy array): The second pattern matrix.
-
-    Returns:
-    numpy array: The new pattern matrix.
-    """
-    return np.dot(pattern_matrix1, pattern_matrix2)
+    Patterns are pulled from the iterable chunk_size at a time and added in
+    place into out, row block by row block, so memory stays at one output
+    matrix plus the chunk being added no matter how many patterns there are
+    (for generators the default chunk is a single pattern).
+    With workers > 1 the row blocks are spread over a thread pool (NumPy
+    releases the GIL); every element is still summed in input order, so the
+    result does not depend on the number of workers.
 
-def visualize_pattern(pattern_matrix):
-    """
-    Visualize the pattern matrix as a heatmap.
+    scipy.sparse patterns are added from their non-zeros. While every
+    pattern so far is sparse (and no out is given) the sum is kept as a
+    sparse CSR matrix; the first dense pattern turns it into an array.
 
     Parameters:
-    pattern_matrix (numpy array): The pattern matrix.
-    """
-    plt.imshow(pattern_matrix, cmap='hot', interpolation='nearest')
-    plt.show()
+    pattern_matrices (iterable of numpy arrays or sparse matrices): The
+        patterns, all of one shape; may be a generator.
+    weights (iterable of float): Optional weight for each pattern.
+    out (numpy array): Buffer to accumulate into; its contents are included in
+        the sum, and it must be able to hold the patterns' and weights' dtype.
+        If omitted a zero buffer is allocated and upcast as needed, e.g. to
+        float when a float pattern or weight follows integer patterns.
+    workers (int): Threads summing row blocks in parallel.
+    chunk_size (int): Patterns added per pass over the output; defaults to 16
+        for lists, tuples and arrays, whose patterns are in memory anyway, and
+        to 1 for other iterables.
+    block_bytes (int): Approximate size of the row blocks.
 
-def analyze_relationship(pattern_matrix1, pattern_matrix2):
-    """
-    Analyze the relationship between two pattern matrices by calculating the absolute difference.
+    Returns:
+    numpy array or sparse matrix: The element-wise (weighted) sum.
+    """
+    if chunk_size is None:
+        chunk_size = 16 if isinstance(pattern_matrices, (list, tuple, np.ndarray)) else 1
+    patterns = iter(pattern_matrices)
+    weights = None if weights is None else iter(weights)
+    # A buffer allocated here is upcast as wider patterns or weights arrive; a caller's is only checked
+    owned = False
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while True:
+            chunk = [matrix if _issparse(matrix) else np.asarray(matrix)
+                     for matrix in itertools.islice(patterns, chunk_size)]
+            if not chunk:
+                break
+            scales = None
+            if weights is not None:
+                scales = list(itertools.islice(weights, len(chunk)))
+                if len(scales) != len(chunk):
+                    raise ValueError("Fewer weights than pattern matrices")
+            dtype = np.result_type(*(matrix.dtype for matrix in chunk), *(scales or []))
+            if out is None:
+                owned = True
+                out = sparse.csr_matrix(chunk[0].shape, dtype=dtype) if _issparse(chunk[0]) else \
+                    np.zeros(chunk[0].shape, dtype=dtype)
+            out = _promote(out, dtype, owned)
+            for matrix in chunk:
+                if matrix.shape != out.shape:
+                    raise ValueError(f"Pattern of shape {matrix.shape} does not match {out.shape}")
+
+            # Runs of dense patterns are added block by block; sparse ones from their non-zeros, in order
+            terms = list(zip(chunk, scales or itertools.repeat(None)))
+            for is_sparse, run in itertools.groupby(terms, key=lambda term: _issparse(term[0])):
+                run = list(run)
+                if is_sparse:
+                    for matrix, scale in run:
+                        out = _add_sparse(out, matrix, scale)
+                    continue
+                if _issparse(out):
+                    out = out.toarray()
+
+                def add_block(rows):
+                    target = out[rows]
+                    for matrix, scale in run:
+                        if scale is None:
+                            target += matrix[rows]
+                        else:
+                            target += scale * matrix[rows]
+
+                if out.ndim:
+                    step = max(1, block_bytes // max(1, out[0].nbytes))
+                    blocks = [slice(start, start + step) for start in range(0, out.shape[0], step)]
+                else:
+                    blocks = [Ellipsis]
+                if pool is None or len(blocks) < 2:
+                    for rows in blocks:
+                        add_block(rows)
+                else:
+                    list(pool.map(add_block, blocks))
+            # Let the chunk go before the next one is pulled from the iterable
+            chunk = scales = terms = run = None
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if out is None:
+        raise ValueError("No pattern matrices to sum")
+    return out
+
+def _promote(out, dtype, owned):
+    # out able to hold sums with dtype terms: upcast when it is ours, else refuse to truncate silently
+    dtype = np.result_type(out.dtype, dtype)
+    if dtype == out.dtype:
+        return out
+    if owned:
+        return out.astype(dtype)
+    if not np.can_cast(dtype, out.dtype, casting='same_kind'):
+        raise TypeError(f"Cannot accumulate {dtype} patterns into an out buffer of dtype {out.dtype}")
+    return out
+
+def _add_sparse(out, matrix, scale=None):
+    # out + scale * matrix for a sparse matrix: a new sparse sum, or in place into a dense buffer
+    if scale is not None:
+        matrix = matrix * scale
+    if _issparse(out):
+        return (out + matrix).tocsr()
+    # Fancy-index += casts unsafely, so an integer buffer would truncate float entries
+    out = _promote(out, matrix.dtype, owned=False)
+    entries = _canonical(matrix).tocoo()
+    out[entries.row, entries.col] += entries.data
+    return out
+
+def create_vortex(pattern_matrices, weights=None, out=None, workers=1):
+    """
+    Create a vortex by summing multiple pattern matrices element-wise.
 
     Parameters:
-    pattern_matrix1 (numpy array): The first pattern matrix.
-    pattern_matrix2 (numpy array): The second pattern matrix.
+    pattern_matrices (iterable of numpy arrays or sparse matrices): The pattern matrices;
+        may be a generator.
+    weights (iterable of float): Optional weight for each pattern.
+    out (numpy array): Optional preallocated buffer to accumulate into.
+    workers (int): Threads for the parallel reduction.
 
     Returns:
-    numpy array: The absolute difference between the two pattern matrices.
+    numpy array or sparse matrix: The vortex.
     """
-    return np.abs(pattern_matrix1 - pattern_matrix2)
+    return accumulate_patterns(pattern_matrices, weights, out, workers)
 
-def create_difference_matrix(pattern_matrix1, pattern_matrix2):
+def simulate_system(vortices, weights=None, out=None, workers=1):
     """
-    Create a difference matrix by calculating the absolute difference between two pattern matrices.
+    Simulate the system by summing multiple vortices element-wise.
 
     Parameters:
-    pattern_matrix1 (numpy array): The first pattern matrix.
-    pattern_matrix2 (numpy array): The second pattern matrix.
+    vortices (iterable of numpy arrays or sparse matrices): The vortices; may be a
+        generator.
+    weights (iterable of float): Optional weight for each vortex.
+    out (numpy array): Optional preallocated buffer to accumulate into.
+    workers (int): Threads for the parallel reduction.
 
     Returns:
-    numpy array: The difference matrix.
+    numpy array or sparse matrix: The simulated system.
     """
-    return np.abs(pattern_matrix1 - pattern_matrix2)
+    return accumulate_patterns(vortices, weights, out, workers)
 
-def increment_values(pattern_matrix):
-    """
-    Increment the values in the pattern matrix by 1.
+if __name__ == "__main__":
+    # Generate random pattern matrices
+    pattern_matrix1 = np.random.rand(10, 10)
+    pattern_matrix2 = np.random.rand(10, 10)
 
-    Parameters:
-    pattern_matrix (numpy array): The pattern matrix.
+    # Generate a new pattern matrix
+    new_pattern_matrix = generate_pattern(pattern_matrix1, pattern_matrix2)
 
-    Returns:
-    numpy array: The pattern matrix with incremented values.
-    """
-    return pattern_matrix + 1
+    # Visualize the new pattern matrix
+    visualize_pattern(new_pattern_matrix)
 
-def create_vortex(pattern_matrices):
-    """
-    Create a vortex by summing multiple pattern matrices.
+    # Analyze the relationship between the two pattern matrices
+    relationship = analyze_relationship(pattern_matrix1, pattern_matrix2)
 
-    Parameters:
-    pattern_matrices (list of numpy arrays): The list of pattern matrices.
+    # Create a difference matrix
+    difference_matrix = create_difference_matrix(pattern_matrix1, pattern_matrix2)
 
-    Returns:
-    numpy array: The vortex.
-    """
-    return np.sum(pattern_matrices)
+    # Increment the values in the pattern matrix
+    incremented_pattern_matrix = increment_values(pattern_matrix1)
 
-def simulate_system(vortices):
-    """
-    Simulate the system by summing multiple vortices.
+    # Create a vortex
+    vortex = create_vortex([pattern_matrix1, pattern_matrix2])
 
-    Parameters:
-    vortices (list of numpy arrays): The list of vortices.
+    # Simulate the system
+    simulated_system = simulate_system([vortex, vortex])
 
-    Returns:
-    numpy array: The simulated system.
-    """
-    return np.sum(vortices)
-
-# Generate random pattern matrices
-pattern_matrix1 = np.random.rand(10, 10)
-pattern_matrix2 = np.random.rand(10, 10)
-
-# Generate a new pattern matrix
-new_pattern_matrix = generate_pattern(pattern_matrix1, pattern_matrix2)
-
-# Visualize the new pattern matrix
-visualize_pattern(new_pattern_matrix)
-
-# Analyze the relationship between the two pattern matrices
-relationship = analyze_relationship(pattern_matrix1, pattern_matrix2)
-
-# Create a difference matrix
-difference_matrix = create_difference_matrix(pattern_matrix1, pattern_matrix2)
-
-# Increment the values in the pattern matrix
-incremented_pattern_matrix = increment_values(pattern_matrix1)
-
-# Create a vortex
-vortex = create_vortex([pattern_matrix1, pattern_matrix2])
-
-# Simulate the system
-simulated_system = simulate_system([vortex, vortex])
-
-# Print the results
-print("New Pattern Matrix:")
-print(new_pattern_matrix)
-print("Relationship:")
-print(relationship)
-print("Difference Matrix:")
-print(difference_matrix)
-print("Incremented Pattern Matrix:")
-print(incremented_pattern_matrix)
-print("Vortex:")
-print(vortex)
-print("Simulated System:")
-print(simulated_system)
-```
-This code is well-structured and easy to follow. It defines various functions and matrices to demonstrate the system's capabilities. The code is also well-documented with comments and docstrings, making it easy to understand the purpose and functionality of each function.
-"""
+    # Print the results
+    print("New Pattern Matrix:")
+    print(new_pattern_matrix)
+    print("Relationship:")
+    print(relationship)
+    print("Difference Matrix:")
+    print(difference_matrix)
+    print("Incremented Pattern Matrix:")
+    print(incremented_pattern_matrix)
+    print("Vortex:")
+    print(vortex)
+    print("Simulated System:")
+    print(simulated_system)
@@ -0,0 +1,541 @@
+"""
+Number-theory tools from the 2024-07-02 notes, as an importable library.
+
+The notes compute the golden-ratio convergent h_n by running h = 1 + 1/h on
+Fraction objects n times, normalizing with a gcd at every step. Here a
+continued fraction [a0; a1, a2, ...] is handled through its matrices
+
+    [[a0, 1], [1, 0]] @ [[a1, 1], [1, 0]] @ ... @ [[ak, 1], [1, 0]]
+        = [[p_k, p_(k-1)], [q_k, q_(k-1)]]
+
+whose columns are the convergents p_k / q_k. Convergents of a continued
+fraction are always in lowest terms, so none of them needs a gcd. Products
+of many terms are formed by binary splitting (balanced, so the big-integer
+multiplications stay balanced too), a repeating period is raised to a power
+by squaring, and the golden ratio uses Fibonacci fast doubling: the
+millionth convergent takes a fraction of a second.
+
+salmon_equation_solver() screens whole tables of quadratics a x^2 + b x + c
+for the notes' discriminant b^2 - 4ac = 5 at once, returning NumPy arrays
+and a validity mask rather than one error string per failing triple.
+
+batch_galois_groups() and batch_diophantine() run the notes' Galois group
+and linear Diophantine solvers over whole tables of (a, b, c). Each triple is
+first reduced to a canonical form shared by every equivalent instance; the
+results are cached by that form, and only the distinct uncached instances
+go to a process pool, each under its own time limit. Results stream back
+as they finish.
+"""
+
+import math
+import os
+import signal
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fractions import Fraction
+
+import numpy as np
+import sympy as sp
+
+# Identity of the convergent recurrence, as (p_k, p_(k-1), q_k, q_(k-1))
+_IDENTITY = (1, 0, 0, 1)
+
+
+def _multiply(left, right):
+    # 2 x 2 integer matrix product on (a, b, c, d) = [[a, b], [c, d]]
+    a, b, c, d = left
+    e, f, g, h = right
+    return (a * e + b * g, a * f + b * h, c * e + d * g, c * f + d * h)
+
+
+def _power(matrix, exponent):
+    result = _IDENTITY
+    while exponent:
+        if exponent & 1:
+            result = _multiply(result, matrix)
+        exponent >>= 1
+        if exponent:
+            matrix = _multiply(matrix, matrix)
+    return result
+
+
+def _product(terms):
+    # Product of the term matrices of a finite sequence, by binary splitting
+    matrices = [(a, 1, 1, 0) for a in terms]
+    if not matrices:
+        return _IDENTITY
+    while len(matrices) > 1:
+        paired = [_multiply(matrices[i], matrices[i + 1]) for i in range(0, len(matrices) - 1, 2)]
+        if len(matrices) % 2:
+            paired.append(matrices[-1])
+        matrices = paired
+    return matrices[0]
+
+
+def _fraction(numerator, denominator):
+    # Convergents are already in lowest terms, and for huge ones Fraction's gcd costs ten times the
+    # matrix products (0.67 s against 0.07 s for h_1000000). Skipping it takes private CPython API,
+    # checked on 3.8-3.11 (_normalize=False) and 3.12-3.13 (_from_coprime_ints); if that is gone or
+    # behaves differently we fall back to the public constructor.
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+    if denominator == 0:
+        raise ZeroDivisionError("Continued fraction has a zero denominator")
+    try:
+        if hasattr(Fraction, '_from_coprime_ints'):
+            fraction = Fraction._from_coprime_ints(numerator, denominator)
+        else:
+            fraction = Fraction(numerator, denominator, _normalize=False)
+    except TypeError:
+        return Fraction(numerator, denominator)
+    if fraction.numerator != numerator or fraction.denominator != denominator:
+        return Fraction(numerator, denominator)
+    return fraction
+
+
+def fibonacci_pair(n):
+    """
+    The Fibonacci numbers (F(n), F(n + 1)) by fast doubling, in O(log n) multiplications.
+    """
+    if n < 0:
+        raise ValueError("n must be non-negative")
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        # F(2k) = F(k) (2 F(k+1) - F(k)),  F(2k+1) = F(k)^2 + F(k+1)^2
+        c, d = a * (2 * b - a), a * a + b * b
+        a, b = (d, c + d) if bit == '1' else (c, d)
+    return a, b
+
+
+def convergents(terms):
+    """
+    Stream the convergents of a continued fraction.
+
+    Each convergent follows from the previous two with one multiply-add per
+    component, p_k = a_k p_(k-1) + p_(k-2), and none is re-normalized.
+
+    Parameters:
+    terms (iterable of int): The terms a0, a1, ...; may be an infinite generator.
+
+    Yields:
+    tuple: (p_k, q_k), the numerator and denominator of each convergent.
+    """
+    p, p_previous, q, q_previous = _IDENTITY
+    for a in terms:
+        p, p_previous = a * p + p_previous, p
+        q, q_previous = a * q + q_previous, q
+        yield p, q
+
+
+def convergent(prefix, period=(), n=None):
+    """
+    The n-th convergent of the continued fraction [prefix; period, period, ...].
+
+    Parameters:
+    prefix (sequence of int): The leading terms a0, a1, ...
+    period (sequence of int): Terms repeated forever after the prefix, as in
+        the expansion of a quadratic irrational; empty for a finite expansion.
+    n (int): Index of the convergent, counting a0 as 0; defaults to the last
+        term of a finite expansion.
+
+    Returns:
+    tuple: (p_n, q_n), in lowest terms.
+    """
+    prefix, period = list(prefix), list(period)
+    if n is None:
+        if period:
+            raise ValueError("n is required for a periodic continued fraction")
+        n = len(prefix) - 1
+    if n < 0:
+        raise ValueError("n must be non-negative")
+    if n < len(prefix):
+        matrix = _product(prefix[:n + 1])
+    elif not period:
+        raise IndexError(f"Convergent {n} of a {len(prefix)}-term continued fraction")
+    else:
+        repeats, remainder = divmod(n + 1 - len(prefix), len(period))
+        matrix = _multiply(_multiply(_product(prefix), _power(_product(period), repeats)),
+                           _product(period[:remainder]))
+    return matrix[0], matrix[2]
+
+
+def evaluate(terms):
+    """
+    The value of a finite continued fraction [a0; a1, ..., ak], as a Fraction.
+    """
+    return _fraction(*convergent(terms))
+
+
+def continued_fraction(value, max_terms=None):
+    """
+    The continued fraction terms of a rational number, by the Euclidean algorithm.
+
+    Parameters:
+    value (int, Fraction or str): The number to expand.
+    max_terms (int): Stop after this many terms.
+
+    Returns:
+    list of int: The terms a0, a1, ...
+    """
+    value = Fraction(value)
+    numerator, denominator = value.numerator, value.denominator
+    terms = []
+    while denominator and (max_terms is None or len(terms) < max_terms):
+        a, remainder = divmod(numerator, denominator)
+        terms.append(a)
+        numerator, denominator = denominator, remainder
+    return terms
+
+
+def continued_fraction_h(n):
+    """
+    The golden-ratio convergent h_n of the notes, h_1 = 1 and h_(k+1) = 1 + 1 / h_k.
+
+    h_n = [1; 1, ..., 1] with n terms = F(n + 1) / F(n).
+
+    Parameters:
+    n (int): The number of terms.
+
+    Returns:
+    Fraction: h_n (1 for n < 1, as in the notes).
+    """
+    if n < 1:
+        return Fraction(1)
+    numerator_previous, numerator = fibonacci_pair(n)
+    return _fraction(numerator, numerator_previous)
+
+
+# Per-equation results of salmon_equation_solver(); roots are NaN where valid is False
+SalmonRoots = namedtuple('SalmonRoots', ['root1', 'root2', 'discriminant', 'valid'])
+
+# Integer coefficients below this bound have b^2 - 4ac well inside int64
+_INT64_SAFE = 1 << 30
+
+
+def _exact_integers(values):
+    array = np.asarray(values, dtype=object)
+    exact = np.empty(array.shape, dtype=object)
+    for index, value in np.ndenumerate(array):
+        if isinstance(value, (float, np.floating)) and not float(value).is_integer() or \
+                isinstance(value, Fraction) and value.denominator != 1:
+            raise ValueError(f"Exact mode needs integer coefficients, got {value!r}")
+        exact[index] = int(value)
+    return exact
+
+
+def _exact_roots(a, b, c):
+    # Stable roots of a x^2 + b x + c with b^2 - 4ac = 5 (so b is odd, never 0), from exact integers:
+    #   -(b + sign(b) sqrt 5) / 2a = (-b / 2a) (1 + sqrt 5 / |b|)   and   -2c / (b + sign(b) sqrt 5),
+    # so nothing cancels, and only the quotients of integers, which fit a float whenever the roots do,
+    # are rounded
+    scale = 1 + math.sqrt(5) / abs(b) if abs(b) < 1 << 1000 else 1.0
+    large = float(Fraction(-b, 2 * a)) * scale
+    small = float(Fraction(-2 * c, b)) / scale
+    return (small, large) if b >= 0 else (large, small)
+
+
+def salmon_equation_solver(a, b, c, exact=False):
+    """
+    Solve a x^2 + b x + c = 0 for coefficient arrays whose discriminant is 5.
+
+    The discriminant b^2 - 4ac of every triple is computed in bulk, and the
+    roots of the triples where it equals 5 (the notes' Fibonacci-inspired
+    condition) come from the cancellation-free form of the quadratic formula:
+
+        q = -(b + sign(b) sqrt(disc)) / 2,   roots q / a and c / q
+
+    root1 and root2 keep the notes' order, (-b + sqrt 5) / 2a then
+    (-b - sqrt 5) / 2a.
+
+    Integer coefficients are checked in int64 while that cannot overflow,
+    and exactly (as with exact=True) once they are too big for it. With
+    exact=True the discriminant is formed from Python integers of any size,
+    so the check is exact however big the coefficients, and each root is
+    rounded to float only once at the end.
+
+    Parameters:
+    a, b, c (array_like): The coefficients, broadcast together; shape (N,) or scalars.
+    exact (bool): Use exact integer arithmetic; the coefficients must be integers.
+
+    Returns:
+    SalmonRoots: root1, root2 (float arrays, NaN where invalid), the
+    discriminants (int or float; object arrays when solved exactly) and the valid
+    mask: True where a != 0 and the discriminant is 5.
+    """
+    if not exact:
+        a, b, c = np.broadcast_arrays(np.asarray(a), np.asarray(b), np.asarray(c))
+        kind = np.result_type(a, b, c).kind
+        # Integers too big for the int64 check would lose digits in float64; they go exact instead
+        if kind in 'iub':
+            exact = not all(not x.size or -_INT64_SAFE < x.min() and x.max() < _INT64_SAFE for x in (a, b, c))
+        elif kind == 'O':
+            exact = all(isinstance(v, (int, np.integer)) for x in (a, b, c) for v in x.flat)
+    if exact:
+        a, b, c = np.broadcast_arrays(_exact_integers(a), _exact_integers(b), _exact_integers(c))
+        shape = a.shape
+        # Flattened, so that scalar coefficients index like any other
+        a, b, c = (x.reshape(-1) for x in (a, b, c))
+        discriminant = b * b - 4 * a * c
+        valid = np.asarray((discriminant == 5) & (a != 0), dtype=bool)
+        root1 = np.full(valid.shape, np.nan)
+        root2 = np.full(valid.shape, np.nan)
+        for i in np.flatnonzero(valid):
+            root1[i], root2[i] = _exact_roots(a[i], b[i], c[i])
+        return SalmonRoots(*(x.reshape(shape) for x in (root1, root2, discriminant, valid)))
+
+    if np.result_type(a, b, c).kind in 'iub':
+        a, b, c = (x.astype(np.int64) for x in (a, b, c))
+    else:
+        a, b, c = (x.astype(np.float64) for x in (a, b, c))
+    discriminant = b * b - 4 * a * c
+    valid = (discriminant == 5) & (a != 0)
+
+    root1 = np.full(valid.shape, np.nan)
+    root2 = np.full(valid.shape, np.nan)
+    a, b, c = (x[valid].astype(np.float64) for x in (a, b, c))
+    sign = np.where(b >= 0, 1.0, -1.0)
+    q = -0.5 * (b + sign * math.sqrt(5))
+    large, small = q / a, c / q
+    positive = b >= 0
+    root1[valid] = np.where(positive, small, large)
+    root2[valid] = np.where(positive, large, small)
+    return SalmonRoots(root1, root2, discriminant, valid)
+
+
+_x, _y = sp.symbols('x y')
+
+# One result of a batch solve: the table row, its (a, b, c), the solver's
+# value and a status of 'solved', 'cached', 'timeout' or 'error' (value is then the message)
+BatchResult = namedtuple('BatchResult', ['index', 'coefficients', 'value', 'status'])
+
+# Canonical form -> (status, value), shared by every batch run in this process
+_galois_cache = {}
+_diophantine_cache = {}
+
+
+class SolverTimeout(Exception):
+    pass
+
+
+def _primitive(coefficients):
+    # Divide out the content and make the leading non-zero coefficient positive
+    content = math.gcd(*coefficients)
+    if content == 0:
+        return tuple(coefficients)
+    leading = next(value for value in coefficients if value)
+    content = content if leading > 0 else -content
+    return tuple(value // content for value in coefficients)
+
+
+def galois_key(a, b, c):
+    """
+    Canonical form of a x^3 - 3b x^2 + c x - 1 for its Galois group.
+
+    A cubic is depressed with x = (y + 3b) / 3a, which turns 27a^2 times it
+    into y^3 + P y + Q with integer P = 3(3ac - 9b^2) and
+    Q = -54b^3 + 27abc - 27a^2. Scaling the roots by k (P / k^2, Q / k^3) and
+    negating them (Q -> -Q) leave the splitting field alone, so small-prime
+    scalings are divided out and Q is made non-negative. Lower degrees
+    (a = 0) keep their primitive coefficients. Equal keys always mean equal
+    Galois groups.
+
+    Returns:
+    tuple: The key; also the coefficients, highest degree first, of a
+    polynomial with the same Galois group.
+    """
+    a, b, c = int(a), int(b), int(c)
+    if a == 0:
+        coefficients = [-3 * b, c, -1]
+        while coefficients[0] == 0:
+            coefficients.pop(0)
+        return _primitive(coefficients)
+    p, q = -3 * b, c
+    P = 3 * (3 * a * q - p * p)
+    Q = 2 * p ** 3 - 9 * a * p * q - 27 * a * a
+    common = math.gcd(P, Q)
+    if common > 1:
+        for prime in sp.factorint(common, limit=1 << 16):
+            while P % prime ** 2 == 0 and Q % prime ** 3 == 0:
+                P, Q = P // prime ** 2, Q // prime ** 3
+    return (1, 0, P, abs(Q))
+
+
+def diophantine_key(a, b, c):
+    """
+    Canonical form of a x + b y = c: divided by gcd(a, b, c), leading coefficient positive.
+
+    Equations with equal keys have the same integer solutions.
+    """
+    return _primitive([int(a), int(b), int(c)])
+
+
+def _solve_galois(key):
+    return sp.Poly(list(key), _x).galois_group()
+
+
+def _solve_diophantine(key):
+    a, b, c = key
+    return sp.diophantine(sp.Eq(a * _x + b * _y, c))
+
+
+def _run_with_timeout(solver, key, timeout):
+    # Enforce the time limit with an interval timer, as simplify_with_budget() does in the curvature code
+    if timeout is None or not hasattr(signal, 'setitimer') or \
+            threading.current_thread() is not threading.main_thread():
+        return solver(key)
+
+    def on_timeout(signum, frame):
+        raise SolverTimeout
+
+    previous = signal.signal(signal.SIGALRM, on_timeout)
+    # A timer the caller had running is suspended meanwhile (and cuts the limit short if it is due sooner)
+    start = time.monotonic()
+    outer_delay, outer_interval = signal.setitimer(signal.ITIMER_REAL, timeout)
+    if outer_delay and outer_delay < timeout:
+        signal.setitimer(signal.ITIMER_REAL, outer_delay)
+    try:
+        return solver(key)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+        if outer_delay:
+            # Re-arm it with what is left; a timer already due fires straight away
+            signal.setitimer(signal.ITIMER_REAL, max(outer_delay - (time.monotonic() - start), 1e-6),
+                             outer_interval)
+
+
+def _task(solver, key, timeout):
+    # (status, value) for one canonical instance; runs in a worker process
+    try:
+        return 'solved', _run_with_timeout(solver, key, timeout)
+    except SolverTimeout:
+        return 'timeout', None
+    except Exception as exc:
+        return 'error', f"{type(exc).__name__}: {exc}"
+
+
+def _batch(solver, canonical, cache, table, workers, timeout):
+    # Group the rows by canonical form, answer cached forms at once, and solve the rest in parallel
+    pending = {}
+    for index, row in enumerate(table):
+        coefficients = tuple(int(value) for value in row)
+        if len(coefficients) != 3:
+            raise ValueError(f"Row {index} has {len(coefficients)} coefficients; expected (a, b, c)")
+        key = canonical(*coefficients)
+        if key in cache:
+            status, value = cache[key]
+            yield BatchResult(index, coefficients, value, 'cached' if status == 'solved' else status)
+        else:
+            pending.setdefault(key, []).append((index, coefficients))
+
+    def finish(key, outcome):
+        status, value = outcome
+        if status != 'timeout':
+            # Solutions and deterministic failures are kept; a longer time limit may still beat a timeout
+            cache[key] = outcome
+        return [BatchResult(index, coefficients, value, status) for index, coefficients in pending[key]]
+
+    if workers == 1 or len(pending) < 2:
+        for key in pending:
+            yield from finish(key, _task(solver, key, timeout))
+        return
+    pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+    try:
+        futures = {pool.submit(_task, solver, key, timeout): key for key in pending}
+        for future in as_completed(futures):
+            yield from finish(futures[future], future.result())
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def batch_galois_groups(table, workers=None, timeout=None, cache=None):
+    """
+    Galois groups of a x^3 - 3b x^2 + c x - 1 for a table of coefficients.
+
+    Parameters:
+    table (iterable): Rows of integer (a, b, c), e.g. an (N, 3) array.
+    workers (int): Worker processes; 1 solves in this process, None uses every core.
+    timeout (float): Seconds allowed per distinct instance; None for no limit.
+    cache (dict-like): Maps galois_key() forms to results; defaults to a
+        per-process cache shared by all calls.
+
+    Yields:
+    BatchResult: One per row, in completion order; value is sympy's
+    (PermutationGroup, is_alternating) pair.
+    """
+    yield from _batch(_solve_galois, galois_key, _galois_cache if cache is None else cache, table, workers,
+                      timeout)
+
+
+def batch_diophantine(table, workers=None, timeout=None, cache=None):
+    """
+    Integer solutions of a x + b y = c for a table of coefficients.
+
+    Parameters:
+    table (iterable): Rows of integer (a, b, c), e.g. an (N, 3) array.
+    workers (int): Worker processes; 1 solves in this process, None uses every core.
+    timeout (float): Seconds allowed per distinct instance; None for no limit.
+    cache (dict-like): Maps diophantine_key() forms to results; defaults to a
+        per-process cache shared by all calls.
+
+    Yields:
+    BatchResult: One per row, in completion order; value is sympy's set of
+    parametric solutions.
+    """
+    yield from _batch(_solve_diophantine, diophantine_key, _diophantine_cache if cache is None else cache, table,
+                      workers, timeout)
+
+
+def _single(batch, a, b, c):
+    (result,) = batch([(a, b, c)], workers=1)
+    if result.status in ('solved', 'cached'):
+        return result.value
+    raise ValueError(result.value)
+
+
+def galois_group_symmetry(a, b, c):
+    """
+    The Galois group of a x^3 - 3b x^2 + c x - 1, through the batch cache.
+    """
+    return _single(batch_galois_groups, a, b, c)
+
+
+def diophantine_solver(a, b, c):
+    """
+    The integer solutions of a x + b y = c, through the batch cache.
+    """
+    return _single(batch_diophantine, a, b, c)
+
+
+if __name__ == "__main__":
+    import itertools
+    import time
+
+    print("Salmon roots of (1, -3, 1):", salmon_equation_solver(1, -3, 1))
+    rng = np.random.default_rng(0)
+    table = rng.integers(-50, 51, size=(3, 1_000_000))
+    start = time.perf_counter()
+    screened = salmon_equation_solver(*table)
+    print(f"Screened {table.shape[1]} triples in {time.perf_counter() - start:.3f} s,",
+          f"{screened.valid.sum()} with discriminant 5")
+
+    print("h_5 =", continued_fraction_h(5))
+    print("Galois group of (1, -3, 1):", galois_group_symmetry(1, -3, 1))
+    print("Diophantine 3x + 5y = 7:", diophantine_solver(3, 5, 7))
+    coefficients = rng.integers(-8, 9, size=(2000, 3))
+    start = time.perf_counter()
+    statuses = [result.status for result in batch_galois_groups(coefficients, timeout=10)]
+    print(f"{len(statuses)} Galois groups in {time.perf_counter() - start:.2f} s:",
+          {status: statuses.count(status) for status in sorted(set(statuses))},
+          f"({len(_galois_cache)} distinct canonical forms)")
+    print("sqrt(2) convergents:", list(itertools.islice(convergents(itertools.chain([1], itertools.repeat(2))), 8)))
+    print("sqrt(3) convergent 10:", convergent([1], [1, 2], 10))
+    print("e convergent 20:", convergent([2] + [k for j in range(1, 8) for k in (1, 2 * j, 1)], n=20))
+    print("355/113 =", continued_fraction(Fraction(355, 113)))
+
+    start = time.perf_counter()
+    h = continued_fraction_h(1_000_000)
+    print(f"h_1000000 in {time.perf_counter() - start:.3f} s: {h.denominator.bit_length()} bit denominator,",
+          f"{float(h):.15f} vs {(1 + math.sqrt(5)) / 2:.15f}")
@@ -0,0 +1,356 @@
+"""
+Array-backed ThoughtTree, from the 2024-07-02 notes.
+
+The notes' ThoughtTree is one Python object per node, each holding its own
+token and a reference to a response matrix, with reflect() and execute()
+recursing node by node. Here a whole tree is a handful of arrays:
+
+    tokens    (N, d)  every node's token, one row per node
+    parents   (N,)    index of each node's parent (-1 for the root, node 0)
+    depths    (N,)    distance from the root
+    matrices  (N,)    index into the list of response matrices
+
+Children are recovered from the parent array as CSR-style index arrays
+(child_offsets, child_order), rebuilt only after the tree changes. respond()
+and reflect() work a whole level at a time: the frontier is grouped by
+response matrix and each group is one matrix product and one row-wise
+argmax, so there is no per-node Python call and no recursion limit.
+respond_stream() applies the same idea to long streams of input tokens,
+answering them a fixed-size chunk at a time.
+
+reflect() keeps the notes' semantics: the root responds to the input token
+with argmax(M @ token), and every other node responds to its parent's
+response -- an index, so the product is the scaled matrix and the argmax is
+taken over the flattened result.
+"""
+
+import itertools
+
+import numpy as np
+
+
+def _argmax_responses(matrix, inputs):
+    # Row-wise argmax(np.dot(matrix, input)) for a stack of vector inputs or of scalar inputs
+    inputs = np.asarray(inputs)
+    if inputs.ndim == 1:
+        return np.multiply.outer(inputs, matrix.ravel()).argmax(axis=1)
+    return (inputs @ matrix.T).argmax(axis=1)
+
+
+class ThoughtTree:
+    """
+    A tree of thought tokens stored as contiguous arrays.
+
+    Parameters:
+    token (numpy array): The (d,) token of the root node.
+    response_matrix (numpy array): The response matrix nodes use by default.
+    capacity (int): Initial number of node rows; grows by doubling.
+    """
+
+    def __init__(self, token, response_matrix, capacity=16):
+        token = np.asarray(token)
+        if token.ndim != 1:
+            raise ValueError(f"Tokens must be 1-D, got shape {token.shape}")
+        capacity = max(1, capacity)
+        self._tokens = np.empty((capacity, token.shape[0]), dtype=token.dtype)
+        self._parents = np.empty(capacity, dtype=np.intp)
+        self._depths = np.empty(capacity, dtype=np.intp)
+        self._matrix_index = np.empty(capacity, dtype=np.intp)
+        self.matrices = [np.asarray(response_matrix)]
+        self._size = 0
+        self._children = None
+        self._append(token[None], np.array([-1]), np.array([0]), np.array([0]))
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def tokens(self):
+        """
+        The (N, d) view of every node's token, in node order.
+        """
+        return self._tokens[:self._size]
+
+    @property
+    def parents(self):
+        return self._parents[:self._size]
+
+    @property
+    def depths(self):
+        return self._depths[:self._size]
+
+    @property
+    def matrix_index(self):
+        return self._matrix_index[:self._size]
+
+    @property
+    def response_matrix(self):
+        """
+        The root's response matrix.
+        """
+        return self.matrices[self._matrix_index[0]]
+
+    def _matrix_id(self, response_matrix):
+        # Reuse the slot of a matrix the tree already holds, so shared weights stay shared
+        for n, matrix in enumerate(self.matrices):
+            if matrix is response_matrix:
+                return n
+        self.matrices.append(np.asarray(response_matrix))
+        return len(self.matrices) - 1
+
+    def _append(self, tokens, parents, depths, matrix_index):
+        first, count = self._size, len(tokens)
+        if tokens.shape[1] != self._tokens.shape[1]:
+            raise ValueError(f"Tokens of size {tokens.shape[1]} do not match the tree's {self._tokens.shape[1]}")
+        dtype = np.result_type(self._tokens.dtype, tokens.dtype)
+        if first + count > len(self._tokens) or dtype != self._tokens.dtype:
+            capacity = max(first + count, 2 * len(self._tokens)) if first + count > len(self._tokens) \
+                else len(self._tokens)
+            grown = np.empty((capacity, self._tokens.shape[1]), dtype=dtype)
+            grown[:first] = self._tokens[:first]
+            self._tokens = grown
+            for name in ('_parents', '_depths', '_matrix_index'):
+                array = np.empty(capacity, dtype=np.intp)
+                array[:first] = getattr(self, name)[:first]
+                setattr(self, name, array)
+        self._tokens[first:first + count] = tokens
+        self._parents[first:first + count] = parents
+        self._depths[first:first + count] = depths
+        self._matrix_index[first:first + count] = matrix_index
+        self._size += count
+        self._children = None
+        return range(first, first + count)
+
+    def add_child(self, child, parent=0, response_matrix=None):
+        """
+        Add a node, or a copy of a whole tree, under a parent node.
+
+        Parameters:
+        child (numpy array or ThoughtTree): A (d,) token, or a tree whose
+            nodes are copied in as a subtree.
+        parent (int): Index of the parent node; the root by default.
+        response_matrix (numpy array): The new node's response matrix;
+            defaults to the parent's. Ignored for subtrees, which keep theirs.
+
+        Returns:
+        int: Index of the new node (the subtree's root).
+        """
+        if not -self._size <= parent < self._size:
+            raise IndexError(f"Node {parent} out of range for a tree of {self._size}")
+        parent %= self._size
+        depth = self._depths[parent] + 1
+        if isinstance(child, ThoughtTree):
+            remap = np.array([self._matrix_id(matrix) for matrix in child.matrices], dtype=np.intp)
+            parents = np.where(child.parents < 0, parent, child.parents + self._size)
+            return self._append(child.tokens, parents, child.depths + depth, remap[child.matrix_index])[0]
+        matrix = self._matrix_index[parent] if response_matrix is None else self._matrix_id(response_matrix)
+        return self._append(np.asarray(child)[None], [parent], [depth], [matrix])[0]
+
+    def children(self):
+        """
+        CSR-style child links.
+
+        Returns:
+        tuple: (child_offsets, child_order); the children of node n, in
+        insertion order, are child_order[child_offsets[n]:child_offsets[n + 1]].
+        """
+        if self._children is None:
+            parents = self.parents
+            order = np.argsort(parents[1:], kind='stable') + 1
+            offsets = np.zeros(self._size + 1, dtype=np.intp)
+            np.cumsum(np.bincount(parents[1:], minlength=self._size), out=offsets[1:])
+            self._children = (offsets, order)
+        return self._children
+
+    def levels(self):
+        """
+        The nodes grouped by depth.
+
+        Returns:
+        list of numpy arrays: levels()[k] holds the indices of the nodes at depth k.
+        """
+        depths = self.depths
+        order = np.argsort(depths, kind='stable')
+        bounds = np.searchsorted(depths[order], np.arange(depths.max() + 2))
+        return [order[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    def _respond_nodes(self, nodes, inputs, memo=None):
+        # One product and argmax per response matrix among the nodes, over its distinct inputs only;
+        # memo maps (matrix index, scalar input) to responses already computed in this pass
+        responses = np.empty(len(nodes), dtype=np.intp)
+        matrix_index = self._matrix_index[nodes]
+        if len(nodes) == 1:
+            groups = [(matrix_index[0], slice(None))]
+        else:
+            groups = [(matrix_id, matrix_index == matrix_id) for matrix_id in np.unique(matrix_index)]
+        for matrix_id, group in groups:
+            values = inputs[group]
+            if len(values) == 1:
+                # Deep, narrow levels: skip the sort
+                distinct, inverse = values, np.zeros(1, dtype=np.intp)
+            else:
+                distinct, inverse = np.unique(values, axis=0, return_inverse=True)
+            if memo is None or distinct.ndim != 1:
+                answers = _argmax_responses(self.matrices[matrix_id], distinct)
+            else:
+                keys = [(int(matrix_id), key) for key in distinct.tolist()]
+                missing = [key for key in keys if key not in memo]
+                if missing:
+                    computed = _argmax_responses(self.matrices[matrix_id], np.array([key[1] for key in missing]))
+                    memo.update(zip(missing, computed.tolist()))
+                answers = np.array([memo[key] for key in keys], dtype=np.intp)
+            responses[group] = answers[inverse.ravel()]
+        return responses
+
+    def respond(self, input_token, node=0):
+        """
+        Calculate a node's response to an input token, or to a batch of them.
+
+        Parameters:
+        input_token (numpy array): A (d,) token, or a (B, d) stack of tokens.
+        node (int): The responding node; the root by default.
+
+        Returns:
+        int or numpy array: argmax of the node's response matrix times the
+        input token; (B,) responses for a stack.
+        """
+        matrix = self.matrices[self._matrix_index[node]]
+        input_token = np.asarray(input_token)
+        if input_token.ndim == 2:
+            return _argmax_responses(matrix, input_token)
+        return int(_argmax_responses(matrix, input_token[None])[0])
+
+    def respond_stream(self, input_tokens, node=0, chunk_size=4096, dtype=None, reuse_buffer=False):
+        """
+        Respond to a stream of input tokens, a chunk at a time.
+
+        Tokens are gathered into chunks of chunk_size rows and each chunk is
+        answered with one matrix product into a preallocated buffer and one
+        row-wise argmax, so the cost per token is BLAS work rather than a
+        Python call. Responses are yielded as each chunk completes, so the
+        stream is never held in memory whole.
+
+        Parameters:
+        input_tokens (numpy array or iterable): A (B, d) array, or an
+            iterable (e.g. a generator) of (d,) tokens or (b, d) blocks.
+        node (int): The responding node; the root by default.
+        chunk_size (int): Tokens per matrix product.
+        dtype (numpy dtype): Compute in this type, e.g. np.float32 for twice
+            the throughput; defaults to the matrix and token type.
+        reuse_buffer (bool): Yield views of one response buffer, overwritten
+            by the next chunk, instead of a new array per chunk.
+
+        Yields:
+        numpy array: The responses of one chunk, in input order.
+        """
+        matrix = self.matrices[self._matrix_index[node]]
+        if dtype is not None:
+            matrix = matrix.astype(dtype, copy=False)
+        transposed = np.ascontiguousarray(matrix.T)
+        products = responses = staging = None
+
+        def answer(chunk):
+            nonlocal products, responses
+            if products is None or len(products) < len(chunk):
+                products = np.empty((len(chunk), matrix.shape[0]), dtype=np.result_type(chunk, transposed))
+                responses = np.empty(len(chunk), dtype=np.intp)
+            np.matmul(chunk, transposed, out=products[:len(chunk)])
+            result = products[:len(chunk)].argmax(axis=1, out=responses[:len(chunk)])
+            return result if reuse_buffer else result.copy()
+
+        if isinstance(input_tokens, np.ndarray):
+            if input_tokens.ndim != 2:
+                raise ValueError(f"Expected a (B, d) array of tokens, got shape {input_tokens.shape}")
+            for start in range(0, len(input_tokens), chunk_size):
+                chunk = input_tokens[start:start + chunk_size]
+                yield answer(chunk if dtype is None else chunk.astype(dtype, copy=False))
+            return
+
+        filled = 0
+        for item in input_tokens:
+            rows = np.asarray(item)
+            rows = rows[None] if rows.ndim == 1 else rows
+            if staging is None:
+                staging = np.empty((chunk_size, rows.shape[1]), dtype=dtype or np.result_type(rows, matrix))
+            while len(rows):
+                take = min(chunk_size - filled, len(rows))
+                staging[filled:filled + take] = rows[:take]
+                filled += take
+                rows = rows[take:]
+                if filled == chunk_size:
+                    yield answer(staging)
+                    filled = 0
+        if filled:
+            yield answer(staging[:filled])
+
+    def respond_all(self, input_tokens, node=0, chunk_size=4096, dtype=None):
+        """
+        Responses to every token of a stream, collected into one (B,) array.
+        """
+        chunks = self.respond_stream(input_tokens, node, chunk_size, dtype)
+        return np.fromiter(itertools.chain.from_iterable(chunks), dtype=np.intp)
+
+    def reflect(self, freq_matrix, input_token):
+        """
+        Propagate an input token down the tree, one level at a time.
+
+        The Hurwitz Zeta frequencies of all node tokens are one batched
+        product with freq_matrix. Responses are computed once per distinct
+        (response matrix, input) pair in the pass: siblings share their
+        parent's response as input, and nodes sharing a matrix mostly see
+        the same few response indices, so wide trees need only a handful of
+        products per level.
+
+        Parameters:
+        freq_matrix (numpy array): The (f, d) frequency matrix.
+        input_token (numpy array): The (d,) token the root responds to.
+
+        Returns:
+        numpy structured array: One record per node, in node order, with
+        'response' (the node's argmax response) and 'zeta_freq' (its (f,)
+        frequency vector).
+        """
+        freq_matrix = np.asarray(freq_matrix)
+        zeta_freq = self.tokens @ freq_matrix.T
+        result = np.empty(self._size, dtype=[('response', np.intp),
+                                             ('zeta_freq', zeta_freq.dtype, zeta_freq.shape[1:])])
+        result['zeta_freq'] = zeta_freq
+        responses = result['response']
+        memo = {}
+        levels = self.levels()
+        responses[levels[0]] = self._respond_nodes(levels[0], np.asarray(input_token)[None], memo)
+        for level in levels[1:]:
+            responses[level] = self._respond_nodes(level, responses[self._parents[level]], memo)
+        return result
+
+    def execute(self, indent=0):
+        """
+        Print the tree depth-first, one token per line, indented by depth.
+        """
+        offsets, order = self.children()
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            print('  ' * (indent + self._depths[node]) + str(self._tokens[node]))
+            stack.extend(order[offsets[node]:offsets[node + 1]][::-1].tolist())
+
+
+if __name__ == "__main__":
+    # The notes' demo on the array-backed tree
+    freq_matrix = np.random.rand(10, 10)
+    response_matrix = np.random.rand(10, 10)
+
+    tree = ThoughtTree(np.array([1, 2, 3, 4, 5, 6, 7, 8, 9, 10]), response_matrix)
+    child1 = tree.add_child(np.array([11, 12, 13, 14, 15, 16, 17, 18, 19, 20]))
+    tree.add_child(np.array([21, 22, 23, 24, 25, 26, 27, 28, 29, 30]))
+    tree.add_child(np.array([31, 32, 33, 34, 35, 36, 37, 38, 39, 40]), parent=child1)
+
+    input_token = np.array([41, 42, 43, 44, 45, 46, 47, 48, 49, 50])
+    print("Response:", tree.respond(input_token))
+    stream = (np.random.rand(10) for _ in range(10000))
+    print("Stream responses:", np.bincount(tree.respond_all(stream, dtype=np.float32), minlength=10))
+    reflection = tree.reflect(freq_matrix, input_token)
+    print("Reflected responses:", reflection['response'])
+    print("Zeta frequencies:")
+    print(reflection['zeta_freq'])
+    tree.execute()